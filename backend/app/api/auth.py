@@ -1,51 +1,200 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import datetime, timedelta
 from typing import Optional
 
-from ..core import get_db, verify_password, get_password_hash, create_access_token, decode_access_token, settings
+from ..core import get_db, verify_password_async, verify_and_update_password_async, get_password_hash_async, create_access_token, create_refresh_token, decode_access_token, decode_refresh_token, settings
+from ..core.cache import TTLCache
+from ..core.rate_limit import rate_limit
+from ..core.revoked_tokens import revoked_tokens
+from ..core.token_versions import token_versions
 from ..models import User, UserRole
-from ..schemas import UserCreate, UserResponse, Token, LoginRequest, UserChangePassword
+from ..schemas import UserCreate, UserResponse, Token, LoginRequest, UserChangePassword, RefreshRequest
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Column values of recently authenticated users by username, so most requests skip the user lookup
+user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+
+def cache_user(user: User):
+    """Remember a user's column values for USER_CACHE_TTL_SECONDS"""
+    user_cache.set(user.username, {column.key: getattr(user, column.key) for column in User.__table__.columns})
+
+
+def invalidate_cached_user(*usernames: str):
+    """Drop cached users after their account is changed"""
+    for username in usernames:
+        user_cache.pop(username)
+
+
+def user_changed(user: User, *previous_usernames: str):
+    """Apply a committed change of a user to the token version map and the user cache"""
+    token_versions.update(user.id, user.token_version, bool(user.is_active))  # type: ignore
+    invalidate_cached_user(str(user.username), *previous_usernames)
+
+
+async def revoke_tokens(db: AsyncSession, user: User):
+    """Invalidate every token issued to a user so far, once the change is committed"""
+    # Increment in the database, so concurrent revocations from other workers are never lost
+    result = await db.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(token_version=User.token_version + 1)
+        .returning(User.token_version)
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(user, "token_version", result.scalar_one())
+
+
+# Claims needed to authorize without a lookup, carried by access and refresh tokens alike
+TOKEN_CLAIMS = ("sub", "user_id", "role", "ver")
+
+
+def token_claims(user: User) -> dict:
+    return {
+        "sub": user.username,
+        "user_id": user.id,
+        "role": user.role.value,
+        "ver": user.token_version
+    }
+
+
+def issue_access_token(user: User) -> str:
+    """Create an access token carrying the claims needed to authorize without a lookup"""
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return create_access_token(data=token_claims(user), expires_delta=access_token_expires)
+
+
+def issue_tokens(user: User) -> dict:
+    """Access and refresh token pair returned by the login routes"""
+    return {
+        "access_token": issue_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(token_claims(user))
+    }
+
+
+class TokenPrincipal:
+    """Caller identity and role taken from verified token claims"""
+
+    def __init__(self, id: int, username: str, role: UserRole):
+        self.id = id
+        self.username = username
+        self.role = role
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def inactive_user_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="User account is inactive"
+    )
+
+
+async def verify_token_version(payload: dict):
+    """Reject tokens of inactive users and tokens issued before the user's last revocation"""
+    user_id = payload.get("user_id")
+    entry = await token_versions.get(user_id) if isinstance(user_id, int) else None
+    if entry is None:
+        raise credentials_exception()
+    current_version, is_active = entry
+    if not is_active:
+        raise inactive_user_exception()
+    if payload.get("ver") != current_version:
+        raise credentials_exception()
+
+
+def get_cached_user(username: str, db: AsyncSession) -> Optional[User]:
+    """Rebuild a cached user as a persistent instance of this session, without a query"""
+    values = user_cache.get(username)
+    if values is None:
+        return None
+    user = User(**values)
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
+
+
+async def load_user_for_update(db: AsyncSession, user_id: int) -> User:
+    """Current row of the authenticated user, for handlers that change it; cached users are for read-only checks"""
+    # populate_existing overwrites the cached copy get_current_user attached to this session
+    result = await db.execute(
+        select(User).where(User.id == user_id).execution_options(populate_existing=True)
+    )
+    user = result.scalars().first()
+    if user is None:
+        raise credentials_exception()
+    if not user.is_active:
+        raise inactive_user_exception()
+    return user
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get current authenticated user"""
     payload = decode_access_token(token)
     if payload is None:
-        raise credentials_exception
+        raise credentials_exception()
     
     username: Optional[str] = payload.get("sub")
     if username is None:
-        raise credentials_exception
+        raise credentials_exception()
     
-    user = db.query(User).filter(User.username == username).first()
+    # Tokens issued before token versions existed are checked against the user row only
+    if "ver" in payload:
+        await verify_token_version(payload)
+    
+    user = get_cached_user(username, db)
     if user is None:
-        raise credentials_exception
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalars().first()
+        if user is None:
+            raise credentials_exception()
+        cache_user(user)
     
     # Check if user is active
     if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User account is inactive"
-        )
+        raise inactive_user_exception()
     
     return user
 
 
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> TokenPrincipal:
+    """Get the caller's id and role from the token, without loading the user"""
+    payload = decode_access_token(token)
+    if payload is None:
+        raise credentials_exception()
+    
+    if "ver" not in payload:
+        user = await get_current_user(token, db)
+        return TokenPrincipal(user.id, user.username, user.role)  # type: ignore
+    
+    await verify_token_version(payload)
+    try:
+        return TokenPrincipal(payload["user_id"], payload["sub"], UserRole(payload["role"]))
+    except (KeyError, ValueError):
+        raise credentials_exception()
+
+
 async def get_current_admin_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -75,25 +224,27 @@ def get_user_filter(current_user: User):
     return current_user.id  # Regular users see only their data
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("register", settings.RATE_LIMIT_REGISTER))])
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     # Check if username exists
-    if db.query(User).filter(User.username == user_data.username).first():
+    result = await db.execute(select(User).where(User.username == user_data.username))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
     # Check if email exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -103,18 +254,41 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    user_changed(new_user)
     
     return new_user
 
 
-@router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """User matching the credentials, with an outdated password hash replaced in place"""
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
+    if not user:
+        return None
+    
+    # Return the connection to the pool while the hash is checked, so a burst of logins queued on the
+    # hashing pool doesn't hold every database connection; the loaded user stays usable, detached
+    await db.close()
+    verified, new_hash = await verify_and_update_password_async(password, str(user.hashed_password))
+    if not verified:
+        return None
+    if new_hash is not None:
+        # The password itself is unchanged, so issued tokens stay valid
+        db.add(user)
+        setattr(user, 'hashed_password', new_hash)
+        await db.commit()
+        invalidate_cached_user(str(user.username))
+    return user
+
+
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit("login", settings.RATE_LIMIT_LOGIN))])
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """Login and get access token"""
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = await authenticate_user(db, form_data.username, form_data.password)
     
-    if not user or not verify_password(form_data.password, str(user.hashed_password)):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -128,25 +302,15 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
             detail="User account is inactive"
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={
-            "sub": user.username,
-            "user_id": user.id,
-            "role": user.role.value
-        },
-        expires_delta=access_token_expires
-    )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
+    return issue_tokens(user)
 
 
-@router.post("/login-json", response_model=Token)
-async def login_json(login_data: LoginRequest, db: Session = Depends(get_db)):
+@router.post("/login-json", response_model=Token, dependencies=[Depends(rate_limit("login", settings.RATE_LIMIT_LOGIN))])
+async def login_json(login_data: LoginRequest, db: AsyncSession = Depends(get_db)):
     """Login with JSON body and get access token"""
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = await authenticate_user(db, login_data.username, login_data.password)
     
-    if not user or not verify_password(login_data.password, str(user.hashed_password)):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -160,17 +324,7 @@ async def login_json(login_data: LoginRequest, db: Session = Depends(get_db)):
             detail="User account is inactive"
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={
-            "sub": user.username,
-            "user_id": user.id,
-            "role": user.role.value
-        },
-        expires_delta=access_token_expires
-    )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
+    return issue_tokens(user)
 
 
 @router.get("/me", response_model=UserResponse)
@@ -179,22 +333,56 @@ async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-@router.post("/change-password")
+@router.post("/change-password", dependencies=[Depends(rate_limit("change-password", settings.RATE_LIMIT_CHANGE_PASSWORD))])
 async def change_password(
     password_data: UserChangePassword,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Change user password"""
-    if not verify_password(password_data.old_password, str(current_user.hashed_password)):
+    # The cached user may predate a change made by another worker; verify and write against the row itself
+    user = await load_user_for_update(db, current_user.id)  # type: ignore
+    if not await verify_password_async(password_data.old_password, str(user.hashed_password)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect old password"
         )
     
-    setattr(current_user, 'hashed_password', get_password_hash(password_data.new_password))
-    db.commit()
+    setattr(user, 'hashed_password', await get_password_hash_async(password_data.new_password))
+    await revoke_tokens(db, user)
+    await db.commit()
+    user_changed(user)
+    
+    # Tokens issued before the change are revoked, so hand the caller fresh ones
+    return {"message": "Password changed successfully", **issue_tokens(user)}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(refresh_data: RefreshRequest):
+    """Exchange a refresh token for a new access token, without the password"""
+    payload = decode_refresh_token(refresh_data.refresh_token)
+    if payload is None or await revoked_tokens.is_revoked(payload["jti"]):
+        raise credentials_exception()
+    
+    # Password changes, role changes and deactivation bump the version, revoking refresh tokens too
+    await verify_token_version(payload)
+    try:
+        claims = {claim: payload[claim] for claim in TOKEN_CLAIMS}
+    except KeyError:
+        raise credentials_exception()
+    
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {"access_token": create_access_token(data=claims, expires_delta=access_token_expires), "token_type": "bearer"}
+
+
+@router.post("/logout")
+async def logout(refresh_data: RefreshRequest):
+    """Revoke a refresh token"""
+    payload = decode_refresh_token(refresh_data.refresh_token)
+    if payload is None:
+        raise credentials_exception()
     
-    return {"message": "Password changed successfully"}
+    await revoked_tokens.revoke(payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
+    return {"message": "Logged out successfully"}
 
 # Made with Bob
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date
 
-from ..core import get_db
+from ..core import get_db, get_read_db
+from ..core.idempotency import IdempotentRequest, idempotency_key
 from ..models import BudgetTransaction, MonthlyFinancials, User
 from ..models.budget_transaction import BudgetTransactionType, BudgetAccount
 from ..schemas import (
@@ -15,18 +16,18 @@ from ..schemas import (
     BudgetTransactionSummary
 )
 from .auth import get_current_user
-from .financials import get_or_create_current_month
+from .financials import get_or_create_current_month, increment_month, debit_month, get_month_balance
 
 router = APIRouter(prefix="/budget", tags=["Budget Management"])
 
 
 @router.get("/balances", response_model=BudgetBalances)
 async def get_budget_balances(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get current balances for both accounts"""
-    financials = get_or_create_current_month(db)
+    financials = await get_or_create_current_month(db)
     
     return BudgetBalances(
         monthly_profit=financials.monthly_profit,  # type: ignore
@@ -44,27 +45,28 @@ async def get_budget_transactions(
     account: Optional[BudgetAccount] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get budget transactions with optional filters"""
-    query = db.query(BudgetTransaction)
+    query = select(BudgetTransaction)
     
     if transaction_type:
-        query = query.filter(BudgetTransaction.type == transaction_type)
+        query = query.where(BudgetTransaction.type == transaction_type)
     
     if account:
-        query = query.filter(BudgetTransaction.account == account)
+        query = query.where(BudgetTransaction.account == account)
     
     if start_date:
-        query = query.filter(BudgetTransaction.transaction_date >= start_date)
+        query = query.where(BudgetTransaction.transaction_date >= start_date)
     
     if end_date:
-        query = query.filter(BudgetTransaction.transaction_date <= end_date)
+        query = query.where(BudgetTransaction.transaction_date <= end_date)
     
-    transactions = query.order_by(
+    result = await db.execute(query.order_by(
         BudgetTransaction.transaction_date.desc()
-    ).offset(skip).limit(limit).all()
+    ).offset(skip).limit(limit))
+    transactions = result.scalars().all()
     
     return transactions
 
@@ -72,13 +74,14 @@ async def get_budget_transactions(
 @router.get("/transactions/{transaction_id}", response_model=BudgetTransactionResponse)
 async def get_budget_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific budget transaction"""
-    transaction = db.query(BudgetTransaction).filter(
+    result = await db.execute(select(BudgetTransaction).where(
         BudgetTransaction.id == transaction_id
-    ).first()
+    ))
+    transaction = result.scalars().first()
     
     if not transaction:
         raise HTTPException(
@@ -92,10 +95,15 @@ async def get_budget_transaction(
 @router.post("/add", response_model=BudgetTransactionResponse, status_code=status.HTTP_201_CREATED)
 async def add_funds(
     transaction_data: BudgetTransactionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency: IdempotentRequest = Depends(idempotency_key("budget.add"))
 ):
-    """Add funds to an account"""
+    """Add funds to an account; a retry with the same Idempotency-Key returns the first response"""
+    replay = await idempotency.replay(db, current_user.id)  # type: ignore
+    if replay is not None:
+        return replay
+    
     if transaction_data.type != BudgetTransactionType.ADDITION:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -109,13 +117,7 @@ async def add_funds(
         )
     
     # Get current month's financials
-    financials = get_or_create_current_month(db)
-    
-    # Update the appropriate account
-    if transaction_data.account == BudgetAccount.MONTHLY_PROFIT:
-        financials.monthly_profit += transaction_data.amount  # type: ignore
-    elif transaction_data.account == BudgetAccount.OVERALL_CAPITAL:
-        financials.overall_capital += transaction_data.amount  # type: ignore
+    financials = await get_or_create_current_month(db)
     
     # Create transaction record
     new_transaction = BudgetTransaction(
@@ -124,9 +126,16 @@ async def add_funds(
     )
     
     db.add(new_transaction)
-    db.commit()
-    db.refresh(new_transaction)
-    db.refresh(financials)
+    await db.flush()
+    
+    # Update the appropriate account (enum values are the column names)
+    await increment_month(db, financials, **{transaction_data.account.value: transaction_data.amount})
+    
+    await db.refresh(new_transaction)
+    idempotency.save(db, status.HTTP_201_CREATED, BudgetTransactionResponse.model_validate(new_transaction))
+    replay = await idempotency.commit(db)
+    if replay is not None:
+        return replay
     
     return new_transaction
 
@@ -134,10 +143,15 @@ async def add_funds(
 @router.post("/withdraw", response_model=BudgetTransactionResponse, status_code=status.HTTP_201_CREATED)
 async def withdraw_funds(
     transaction_data: BudgetTransactionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency: IdempotentRequest = Depends(idempotency_key("budget.withdraw"))
 ):
-    """Withdraw funds from an account"""
+    """Withdraw funds from an account; a retry with the same Idempotency-Key returns the first response"""
+    replay = await idempotency.replay(db, current_user.id)  # type: ignore
+    if replay is not None:
+        return replay
+    
     if transaction_data.type != BudgetTransactionType.WITHDRAWAL:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -151,23 +165,7 @@ async def withdraw_funds(
         )
     
     # Get current month's financials
-    financials = get_or_create_current_month(db)
-    
-    # Check if sufficient balance
-    if transaction_data.account == BudgetAccount.MONTHLY_PROFIT:
-        if financials.monthly_profit < transaction_data.amount:  # type: ignore
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient balance in Monthly Profit. Available: ${financials.monthly_profit:.2f}"
-            )
-        financials.monthly_profit -= transaction_data.amount  # type: ignore
-    elif transaction_data.account == BudgetAccount.OVERALL_CAPITAL:
-        if financials.overall_capital < transaction_data.amount:  # type: ignore
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient balance in Overall Capital. Available: ${financials.overall_capital:.2f}"
-            )
-        financials.overall_capital -= transaction_data.amount  # type: ignore
+    financials = await get_or_create_current_month(db)
     
     # Create transaction record
     new_transaction = BudgetTransaction(
@@ -176,9 +174,23 @@ async def withdraw_funds(
     )
     
     db.add(new_transaction)
-    db.commit()
-    db.refresh(new_transaction)
-    db.refresh(financials)
+    await db.flush()
+    
+    # Withdraw only if the account covers the amount, checked and applied in one statement
+    account = transaction_data.account.value
+    if not await debit_month(db, financials, account, transaction_data.amount):
+        available = await get_month_balance(db, financials, account)
+        account_name = "Monthly Profit" if transaction_data.account == BudgetAccount.MONTHLY_PROFIT else "Overall Capital"
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient balance in {account_name}. Available: ${available:.2f}"
+        )
+    
+    await db.refresh(new_transaction)
+    idempotency.save(db, status.HTTP_201_CREATED, BudgetTransactionResponse.model_validate(new_transaction))
+    replay = await idempotency.commit(db)
+    if replay is not None:
+        return replay
     
     return new_transaction
 
@@ -188,22 +200,23 @@ async def get_transaction_summary(
     account: Optional[BudgetAccount] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get summary of budget transactions"""
-    query = db.query(BudgetTransaction)
+    query = select(BudgetTransaction)
     
     if account:
-        query = query.filter(BudgetTransaction.account == account)
+        query = query.where(BudgetTransaction.account == account)
     
     if start_date:
-        query = query.filter(BudgetTransaction.transaction_date >= start_date)
+        query = query.where(BudgetTransaction.transaction_date >= start_date)
     
     if end_date:
-        query = query.filter(BudgetTransaction.transaction_date <= end_date)
+        query = query.where(BudgetTransaction.transaction_date <= end_date)
     
-    transactions = query.all()
+    result = await db.execute(query)
+    transactions = result.scalars().all()
     
     total_additions = sum(
         t.amount for t in transactions
@@ -227,13 +240,14 @@ async def get_transaction_summary(
 async def update_transaction(
     transaction_id: int,
     transaction_data: BudgetTransactionUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a budget transaction (only description and notes)"""
-    transaction = db.query(BudgetTransaction).filter(
+    result = await db.execute(select(BudgetTransaction).where(
         BudgetTransaction.id == transaction_id
-    ).first()
+    ))
+    transaction = result.scalars().first()
     
     if not transaction:
         raise HTTPException(
@@ -246,8 +260,8 @@ async def update_transaction(
     for field, value in update_data.items():
         setattr(transaction, field, value)
     
-    db.commit()
-    db.refresh(transaction)
+    await db.commit()
+    await db.refresh(transaction)
     
     return transaction
 
@@ -255,16 +269,17 @@ async def update_transaction(
 @router.delete("/transactions/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete a budget transaction (admin only)
     WARNING: This will NOT reverse the financial impact
     """
-    transaction = db.query(BudgetTransaction).filter(
+    result = await db.execute(select(BudgetTransaction).where(
         BudgetTransaction.id == transaction_id
-    ).first()
+    ))
+    transaction = result.scalars().first()
     
     if not transaction:
         raise HTTPException(
@@ -272,8 +287,8 @@ async def delete_transaction(
             detail="Transaction not found"
         )
     
-    db.delete(transaction)
-    db.commit()
+    await db.delete(transaction)
+    await db.commit()
     
     return None
 
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import re
 
-from ..core import get_db
-from ..models import Client, User, UserRole
+from ..core import get_db, get_read_db
+from ..models import Client, UserRole
 from ..schemas import ClientCreate, ClientUpdate, ClientResponse
-from .auth import get_current_user, get_user_filter
+from .auth import TokenPrincipal, get_current_principal, get_user_filter
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
@@ -22,45 +23,47 @@ async def get_clients(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get all clients with optional search"""
-    query = db.query(Client)
+    query = select(Client)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Client.created_by == user_filter)
+        query = query.where(Client.created_by == user_filter)
     
     if search:
         search_filter = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             (Client.name.ilike(search_filter)) |
             (Client.email.ilike(search_filter)) |
             (Client.phone.ilike(search_filter)) |
             (Client.location.ilike(search_filter))
         )
     
-    clients = query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    clients = result.scalars().all()
     return clients
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
 async def get_client(
     client_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get a specific client by ID"""
-    query = db.query(Client).filter(Client.id == client_id)
+    query = select(Client).where(Client.id == client_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Client.created_by == user_filter)
+        query = query.where(Client.created_by == user_filter)
     
-    client = query.first()
+    result = await db.execute(query)
+    client = result.scalars().first()
     
     if not client:
         raise HTTPException(
@@ -74,8 +77,8 @@ async def get_client(
 @router.post("/", response_model=ClientResponse, status_code=status.HTTP_201_CREATED)
 async def create_client(
     client_data: ClientCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Create a new client"""
     # Validate email if provided
@@ -87,7 +90,8 @@ async def create_client(
             )
         
         # Check if email already exists
-        existing_client = db.query(Client).filter(Client.email == client_data.email).first()
+        result = await db.execute(select(Client).where(Client.email == client_data.email))
+        existing_client = result.scalars().first()
         if existing_client:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -100,8 +104,8 @@ async def create_client(
     new_client = Client(**client_dict)
     
     db.add(new_client)
-    db.commit()
-    db.refresh(new_client)
+    await db.commit()
+    await db.refresh(new_client)
     
     return new_client
 
@@ -110,18 +114,19 @@ async def create_client(
 async def update_client(
     client_id: int,
     client_data: ClientUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Update a client"""
-    query = db.query(Client).filter(Client.id == client_id)
+    query = select(Client).where(Client.id == client_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Client.created_by == user_filter)
+        query = query.where(Client.created_by == user_filter)
     
-    client = query.first()
+    result = await db.execute(query)
+    client = result.scalars().first()
     
     if not client:
         raise HTTPException(
@@ -141,10 +146,11 @@ async def update_client(
             )
         
         # Check if email already exists (excluding current client)
-        existing_client = db.query(Client).filter(
+        result = await db.execute(select(Client).where(
             Client.email == update_data["email"],
             Client.id != client_id
-        ).first()
+        ))
+        existing_client = result.scalars().first()
         if existing_client:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -154,8 +160,8 @@ async def update_client(
     for field, value in update_data.items():
         setattr(client, field, value)
     
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await db.refresh(client)
     
     return client
 
@@ -163,18 +169,19 @@ async def update_client(
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_client(
     client_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Delete a client"""
-    query = db.query(Client).filter(Client.id == client_id)
+    query = select(Client).where(Client.id == client_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Client.created_by == user_filter)
+        query = query.where(Client.created_by == user_filter)
     
-    client = query.first()
+    result = await db.execute(query)
+    client = result.scalars().first()
     
     if not client:
         raise HTTPException(
@@ -182,8 +189,8 @@ async def delete_client(
             detail="Client not found"
         )
     
-    db.delete(client)
-    db.commit()
+    await db.delete(client)
+    await db.commit()
     
     return None
 
@@ -191,18 +198,19 @@ async def delete_client(
 @router.get("/recent/list", response_model=List[ClientResponse])
 async def get_recent_clients(
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get most recent clients"""
-    query = db.query(Client)
+    query = select(Client)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Client.created_by == user_filter)
+        query = query.where(Client.created_by == user_filter)
     
-    clients = query.order_by(Client.created_at.desc()).limit(limit).all()
+    result = await db.execute(query.order_by(Client.created_at.desc()).limit(limit))
+    clients = result.scalars().all()
     return clients
 
 # Made with Bob
@@ -1,21 +1,24 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
-from ..core import get_db
-from ..models import Client, Order, User, OrderStatus, MonthlyFinancials, UserRole
+from ..core import get_db, get_read_db
+from ..models import Client, Order, OrderStatus, MonthlyFinancials, UserRole
 from ..schemas import DashboardData, DashboardStats, ChartData, MonthlyData, RecentClient, RecentOrder
-from .auth import get_current_user, get_user_filter
+from .auth import TokenPrincipal, get_current_principal, get_user_filter
 from .financials import get_or_create_current_month
+from ..core.instrumentation import query_budget
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
-@router.get("/", response_model=DashboardData)
+# Covers creating the month with sharding enabled; an ordinary request issues 6
+@router.get("/", response_model=DashboardData, dependencies=[Depends(query_budget(11))])
 async def get_dashboard_data(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get all dashboard data including stats, charts, and recent items"""
     
@@ -25,7 +28,7 @@ async def get_dashboard_data(
     # Calculate financial stats based on user role
     if current_user.role == UserRole.ADMIN:  # type: ignore
         # Admin sees system-wide MonthlyFinancials
-        financials = get_or_create_current_month(db)
+        financials = await get_or_create_current_month(db)
         monthly_profit = float(financials.monthly_profit)  # type: ignore
         monthly_revenue = float(financials.monthly_revenue)  # type: ignore
         overall_capital = float(financials.overall_capital)  # type: ignore
@@ -35,40 +38,42 @@ async def get_dashboard_data(
         current_year = datetime.now().year
         
         # Calculate from user's completed orders this month
-        user_orders = db.query(Order).filter(
+        result = await read_db.execute(select(Order).where(
             Order.created_by == user_filter,
             Order.status == OrderStatus.COMPLETED,
             func.extract('month', Order.completed_at) == current_month,
             func.extract('year', Order.completed_at) == current_year
-        ).all()
+        ))
+        user_orders = result.scalars().all()
         
         monthly_profit = sum(order.profit or 0 for order in user_orders)
         monthly_revenue = sum(order.customer_price * order.quantity for order in user_orders)
         
         # Calculate overall capital from all completed orders
-        all_user_orders = db.query(Order).filter(
+        result = await read_db.execute(select(Order).where(
             Order.created_by == user_filter,
             Order.status == OrderStatus.COMPLETED
-        ).all()
+        ))
+        all_user_orders = result.scalars().all()
         overall_capital = sum(order.profit or 0 for order in all_user_orders)
     
     # Count clients
-    client_query = db.query(func.count(Client.id))
+    client_query = select(func.count(Client.id))
     if user_filter is not None:
-        client_query = client_query.filter(Client.created_by == user_filter)
-    total_clients = client_query.scalar() or 0
+        client_query = client_query.where(Client.created_by == user_filter)
+    total_clients = await read_db.scalar(client_query) or 0
     
     # Count ongoing orders
-    order_query = db.query(func.count(Order.id)).filter(Order.status == OrderStatus.PENDING)
+    order_query = select(func.count(Order.id)).where(Order.status == OrderStatus.PENDING)
     if user_filter is not None:
         # Include orders created by user OR assigned to user
-        order_query = order_query.filter(
+        order_query = order_query.where(
             or_(
                 Order.created_by == user_filter,
                 Order.assigned_to == user_filter
             )
         )
-    ongoing_orders = order_query.scalar() or 0
+    ongoing_orders = await read_db.scalar(order_query) or 0
     
     stats = DashboardStats(
         monthly_profit=monthly_profit,
@@ -80,9 +85,10 @@ async def get_dashboard_data(
     
     # Get monthly data for charts (last 12 months)
     current_year = datetime.now().year
-    monthly_records = db.query(MonthlyFinancials).filter(
+    result = await read_db.execute(select(MonthlyFinancials).where(
         MonthlyFinancials.year == current_year
-    ).order_by(MonthlyFinancials.month).all()
+    ).order_by(MonthlyFinancials.month))
+    monthly_records = result.scalars().all()
     
     # Create monthly data for all 12 months
     monthly_data = []
@@ -99,10 +105,11 @@ async def get_dashboard_data(
     chart_data = ChartData(monthly_data=monthly_data)
     
     # Get recent clients
-    recent_clients_query = db.query(Client)
+    recent_clients_query = select(Client)
     if user_filter is not None:
-        recent_clients_query = recent_clients_query.filter(Client.created_by == user_filter)
-    recent_clients_query = recent_clients_query.order_by(Client.created_at.desc()).limit(10).all()
+        recent_clients_query = recent_clients_query.where(Client.created_by == user_filter)
+    result = await read_db.execute(recent_clients_query.order_by(Client.created_at.desc()).limit(10))
+    recent_clients_query = result.scalars().all()
     recent_clients = [
         RecentClient(
             id=client.id,  # type: ignore
@@ -114,16 +121,17 @@ async def get_dashboard_data(
     ]
     
     # Get recent orders
-    recent_orders_query = db.query(Order)
+    recent_orders_query = select(Order)
     if user_filter is not None:
         # Include orders created by user OR assigned to user
-        recent_orders_query = recent_orders_query.filter(
+        recent_orders_query = recent_orders_query.where(
             or_(
                 Order.created_by == user_filter,
                 Order.assigned_to == user_filter
             )
         )
-    recent_orders_query = recent_orders_query.order_by(Order.created_at.desc()).limit(10).all()
+    result = await read_db.execute(recent_orders_query.order_by(Order.created_at.desc()).limit(10))
+    recent_orders_query = result.scalars().all()
     recent_orders = [
         RecentOrder(
             id=order.id,  # type: ignore
@@ -148,8 +156,9 @@ async def get_dashboard_data(
 
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get dashboard statistics only"""
     # Apply role-based filtering
@@ -158,7 +167,7 @@ async def get_dashboard_stats(
     # Calculate financial stats based on user role
     if current_user.role == UserRole.ADMIN:  # type: ignore
         # Admin sees system-wide MonthlyFinancials
-        financials = get_or_create_current_month(db)
+        financials = await get_or_create_current_month(db)
         monthly_profit = float(financials.monthly_profit)  # type: ignore
         monthly_revenue = float(financials.monthly_revenue)  # type: ignore
         overall_capital = float(financials.overall_capital)  # type: ignore
@@ -168,40 +177,42 @@ async def get_dashboard_stats(
         current_year = datetime.now().year
         
         # Calculate from user's completed orders this month
-        user_orders = db.query(Order).filter(
+        result = await read_db.execute(select(Order).where(
             Order.created_by == user_filter,
             Order.status == OrderStatus.COMPLETED,
             func.extract('month', Order.completed_at) == current_month,
             func.extract('year', Order.completed_at) == current_year
-        ).all()
+        ))
+        user_orders = result.scalars().all()
         
         monthly_profit = sum(order.profit or 0 for order in user_orders)
         monthly_revenue = sum(order.customer_price * order.quantity for order in user_orders)
         
         # Calculate overall capital from all completed orders
-        all_user_orders = db.query(Order).filter(
+        result = await read_db.execute(select(Order).where(
             Order.created_by == user_filter,
             Order.status == OrderStatus.COMPLETED
-        ).all()
+        ))
+        all_user_orders = result.scalars().all()
         overall_capital = sum(order.profit or 0 for order in all_user_orders)
     
     # Count clients
-    client_query = db.query(func.count(Client.id))
+    client_query = select(func.count(Client.id))
     if user_filter is not None:
-        client_query = client_query.filter(Client.created_by == user_filter)
-    total_clients = client_query.scalar() or 0
+        client_query = client_query.where(Client.created_by == user_filter)
+    total_clients = await read_db.scalar(client_query) or 0
     
     # Count ongoing orders
-    order_query = db.query(func.count(Order.id)).filter(Order.status == OrderStatus.PENDING)
+    order_query = select(func.count(Order.id)).where(Order.status == OrderStatus.PENDING)
     if user_filter is not None:
         # Include orders created by user OR assigned to user
-        order_query = order_query.filter(
+        order_query = order_query.where(
             or_(
                 Order.created_by == user_filter,
                 Order.assigned_to == user_filter
             )
         )
-    ongoing_orders = order_query.scalar() or 0
+    ongoing_orders = await read_db.scalar(order_query) or 0
     
     return DashboardStats(
         monthly_profit=monthly_profit,
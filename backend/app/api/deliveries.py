@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select, lambda_stmt
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from ..core import get_db
+from ..core import get_db, get_read_db
 from ..models import Delivery, Order, Client, User, DeliveryStatus
 from ..schemas import DeliveryCreate, DeliveryUpdate, DeliveryResponse, DeliveryWithOrder
-from .auth import get_current_user, get_user_filter
+from .auth import TokenPrincipal, get_current_principal, get_user_filter
 
 router = APIRouter(prefix="/deliveries", tags=["Deliveries"])
 
@@ -16,27 +17,30 @@ async def get_deliveries(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     status_filter: Optional[DeliveryStatus] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get all deliveries with optional status filter"""
-    query = db.query(
+    # Lambda statement, so the joined query is only built and compiled once
+    query = lambda_stmt(lambda: select(
         Delivery,
         Order.order_name.label("order_name"),
         Client.name.label("client_name"),
         Client.phone.label("client_phone"),
         User.username.label("created_by_username")
-    ).join(Order, Delivery.order_id == Order.id).join(Client, Order.client_id == Client.id).outerjoin(User, Delivery.created_by == User.id)
+    ).join(Order, Delivery.order_id == Order.id).join(Client, Order.client_id == Client.id).outerjoin(User, Delivery.created_by == User.id))
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Delivery.created_by == user_filter)
+        query += lambda s: s.where(Delivery.created_by == user_filter)
     
     if status_filter:
-        query = query.filter(Delivery.status == status_filter)
+        query += lambda s: s.where(Delivery.status == status_filter)
     
-    results = query.offset(skip).limit(limit).all()
+    query += lambda s: s.offset(skip).limit(limit)
+    result = await db.execute(query)
+    results = result.all()
     
     deliveries = []
     for delivery, order_name, client_name, client_phone, created_by_username in results:
@@ -66,18 +70,19 @@ async def get_deliveries(
 @router.get("/{delivery_id}", response_model=DeliveryResponse)
 async def get_delivery(
     delivery_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get a specific delivery by ID"""
-    query = db.query(Delivery).filter(Delivery.id == delivery_id)
+    query = select(Delivery).where(Delivery.id == delivery_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Delivery.created_by == user_filter)
+        query = query.where(Delivery.created_by == user_filter)
     
-    delivery = query.first()
+    result = await db.execute(query)
+    delivery = result.scalars().first()
     
     if not delivery:
         raise HTTPException(
@@ -91,18 +96,19 @@ async def get_delivery(
 @router.get("/order/{order_id}", response_model=DeliveryResponse)
 async def get_delivery_by_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get delivery for a specific order"""
-    query = db.query(Delivery).filter(Delivery.order_id == order_id)
+    query = select(Delivery).where(Delivery.order_id == order_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Delivery.created_by == user_filter)
+        query = query.where(Delivery.created_by == user_filter)
     
-    delivery = query.first()
+    result = await db.execute(query)
+    delivery = result.scalars().first()
     
     if not delivery:
         raise HTTPException(
@@ -116,19 +122,20 @@ async def get_delivery_by_order(
 @router.post("/", response_model=DeliveryResponse, status_code=status.HTTP_201_CREATED)
 async def create_delivery(
     delivery_data: DeliveryCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Create a new delivery"""
     # Verify order exists and user has access to it
-    order_query = db.query(Order).filter(Order.id == delivery_data.order_id)
+    order_query = select(Order).where(Order.id == delivery_data.order_id)
     
     # Apply role-based filtering for order access
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        order_query = order_query.filter(Order.created_by == user_filter)
+        order_query = order_query.where(Order.created_by == user_filter)
     
-    order = order_query.first()
+    result = await db.execute(order_query)
+    order = result.scalars().first()
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -136,7 +143,8 @@ async def create_delivery(
         )
     
     # Check if delivery already exists for this order
-    existing_delivery = db.query(Delivery).filter(Delivery.order_id == delivery_data.order_id).first()
+    result = await db.execute(select(Delivery).where(Delivery.order_id == delivery_data.order_id))
+    existing_delivery = result.scalars().first()
     if existing_delivery:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -146,8 +154,8 @@ async def create_delivery(
     new_delivery = Delivery(**delivery_data.model_dump(), created_by=current_user.id)
     
     db.add(new_delivery)
-    db.commit()
-    db.refresh(new_delivery)
+    await db.commit()
+    await db.refresh(new_delivery)
     
     return new_delivery
 
@@ -156,18 +164,19 @@ async def create_delivery(
 async def update_delivery(
     delivery_id: int,
     delivery_data: DeliveryUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Update a delivery"""
-    query = db.query(Delivery).filter(Delivery.id == delivery_id)
+    query = select(Delivery).where(Delivery.id == delivery_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Delivery.created_by == user_filter)
+        query = query.where(Delivery.created_by == user_filter)
     
-    delivery = query.first()
+    result = await db.execute(query)
+    delivery = result.scalars().first()
     
     if not delivery:
         raise HTTPException(
@@ -185,8 +194,8 @@ async def update_delivery(
     for field, value in update_data.items():
         setattr(delivery, field, value)
     
-    db.commit()
-    db.refresh(delivery)
+    await db.commit()
+    await db.refresh(delivery)
     
     return delivery
 
@@ -194,18 +203,19 @@ async def update_delivery(
 @router.delete("/{delivery_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_delivery(
     delivery_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Delete a delivery"""
-    query = db.query(Delivery).filter(Delivery.id == delivery_id)
+    query = select(Delivery).where(Delivery.id == delivery_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Delivery.created_by == user_filter)
+        query = query.where(Delivery.created_by == user_filter)
     
-    delivery = query.first()
+    result = await db.execute(query)
+    delivery = result.scalars().first()
     
     if not delivery:
         raise HTTPException(
@@ -213,8 +223,8 @@ async def delete_delivery(
             detail="Delivery not found"
         )
     
-    db.delete(delivery)
-    db.commit()
+    await db.delete(delivery)
+    await db.commit()
     
     return None
 
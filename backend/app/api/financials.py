@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import select, update, func, extract
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date
 
-from ..core import get_db
-from ..models import MonthlyFinancials, User, Order, OrderStatus, UserRole
+from ..core import get_db, get_read_db
+from ..core.database import insert_on_conflict
+from ..core.financial_shards import shards_enabled, shard_total, add_to_shard, apply_shard_totals, fold_shards
+from ..models import MonthlyFinancials, Order, OrderStatus, UserRole
 from ..schemas import (
     MonthlyFinancialsCreate,
     MonthlyFinancialsUpdate,
@@ -13,21 +15,23 @@ from ..schemas import (
     CurrentFinancials,
     FinancialSummary
 )
-from .auth import get_current_user, get_user_filter
+from .auth import TokenPrincipal, get_current_principal, get_user_filter
 
 router = APIRouter(prefix="/financials", tags=["Monthly Financials"])
 
 
-def get_or_create_current_month(db: Session) -> MonthlyFinancials:
+async def get_or_create_current_month(db: AsyncSession) -> MonthlyFinancials:
     """Get or create the current month's financial record"""
     now = datetime.now()
     current_year = now.year
     current_month = now.month
     
-    financials = db.query(MonthlyFinancials).filter(
+    # populate_existing: reload totals already in the session, so shard deltas are added once
+    result = await db.execute(select(MonthlyFinancials).where(
         MonthlyFinancials.year == current_year,
         MonthlyFinancials.month == current_month
-    ).first()
+    ).execution_options(populate_existing=True))
+    financials = result.scalars().first()
     
     if not financials:
         # Get previous month's capital
@@ -38,36 +42,90 @@ def get_or_create_current_month(db: Session) -> MonthlyFinancials:
             prev_year = current_year
             prev_month = current_month - 1
         
-        prev_financials = db.query(MonthlyFinancials).filter(
+        result = await db.execute(select(MonthlyFinancials).where(
             MonthlyFinancials.year == prev_year,
             MonthlyFinancials.month == prev_month
-        ).first()
+        ))
+        prev_financials = result.scalars().first()
+        if prev_financials and shards_enabled():
+            await apply_shard_totals(db, prev_financials)
         
         starting_capital = prev_financials.overall_capital if prev_financials else 0.0
         
-        financials = MonthlyFinancials(
+        # A concurrent request may create the month first; keep its row rather than failing on the unique index
+        await db.execute(insert_on_conflict(db, MonthlyFinancials.__table__).values(
             year=current_year,
             month=current_month,
             monthly_profit=0.0,
             monthly_revenue=0.0,
             overall_capital=starting_capital
-        )
-        db.add(financials)
-        db.commit()
-        db.refresh(financials)
+        ).on_conflict_do_nothing(index_elements=["year", "month"]))
+        await db.commit()
+        result = await db.execute(select(MonthlyFinancials).where(
+            MonthlyFinancials.year == current_year,
+            MonthlyFinancials.month == current_month
+        ))
+        financials = result.scalars().one()
+    
+    if shards_enabled():
+        await apply_shard_totals(db, financials)
     
     return financials
 
 
+async def increment_month(db: AsyncSession, financials: MonthlyFinancials, **deltas: float):
+    """Add to a month's totals in single UPDATEs, so concurrent requests can't overwrite each other"""
+    if shards_enabled():
+        # Credits go to a shard row; debits stay on the month row, where debit_month checks the total
+        credits = {name: delta for name, delta in deltas.items() if delta > 0}
+        if credits:
+            await add_to_shard(db, financials.id, credits)
+        deltas = {name: delta for name, delta in deltas.items() if delta < 0}
+    if deltas:
+        await db.execute(
+            update(MonthlyFinancials)
+            .where(MonthlyFinancials.id == financials.id)
+            .values({name: getattr(MonthlyFinancials, name) + delta for name, delta in deltas.items()})
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def debit_month(db: AsyncSession, financials: MonthlyFinancials, account: str, amount: float) -> bool:
+    """Subtract from a month's total only if it covers the amount, in one UPDATE; False when it doesn't"""
+    balance = getattr(MonthlyFinancials, account)
+    available = balance
+    if shards_enabled():
+        # Lock the month row first, so the shard sum is read after any fold in progress has committed
+        await db.execute(select(MonthlyFinancials.id).where(MonthlyFinancials.id == financials.id).with_for_update())
+        available = balance + shard_total(financials.id, account)
+    result = await db.execute(
+        update(MonthlyFinancials)
+        .where(MonthlyFinancials.id == financials.id, available >= amount)
+        .values({account: balance - amount})
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+async def get_month_balance(db: AsyncSession, financials: MonthlyFinancials, account: str) -> float:
+    """Committed value of a month's total, for reporting an insufficient balance"""
+    balance = getattr(MonthlyFinancials, account)
+    if shards_enabled():
+        balance = balance + shard_total(financials.id, account)
+    result = await db.execute(select(balance).where(MonthlyFinancials.id == financials.id))
+    return result.scalar_one()
+
+
 @router.get("/current", response_model=CurrentFinancials)
 async def get_current_financials(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get current month's financial data"""
     # For admin, return system-wide financials
     if str(current_user.role) == str(UserRole.ADMIN):
-        financials = get_or_create_current_month(db)
+        financials = await get_or_create_current_month(db)
         
         return CurrentFinancials(
             monthly_profit=financials.monthly_profit,  # type: ignore
@@ -83,21 +141,23 @@ async def get_current_financials(
     current_month = now.month
     
     # Calculate user's monthly profit from completed orders
-    user_orders = db.query(Order).filter(
+    result = await read_db.execute(select(Order).where(
         Order.created_by == current_user.id,
         Order.status == OrderStatus.COMPLETED,
         extract('year', Order.updated_at) == current_year,
         extract('month', Order.updated_at) == current_month
-    ).all()
+    ))
+    user_orders = result.scalars().all()
     
     monthly_profit = sum(float(order.profit) for order in user_orders if order.profit is not None)  # type: ignore
     monthly_revenue = sum(float(order.price) for order in user_orders if order.price is not None)  # type: ignore
     
     # Calculate overall capital from all completed orders
-    all_completed = db.query(Order).filter(
+    result = await read_db.execute(select(Order).where(
         Order.created_by == current_user.id,
         Order.status == OrderStatus.COMPLETED
-    ).all()
+    ))
+    all_completed = result.scalars().all()
     
     overall_capital = sum(float(order.profit) for order in all_completed if order.profit is not None)  # type: ignore
     
@@ -112,13 +172,14 @@ async def get_current_financials(
 
 @router.get("/summary", response_model=FinancialSummary)
 async def get_financial_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get complete financial summary including YTD data"""
     # For admin, return system-wide financials
     if str(current_user.role) == str(UserRole.ADMIN):
-        current = get_or_create_current_month(db)
+        current = await get_or_create_current_month(db)
         
         # Get previous month
         if current.month == 1:  # type: ignore
@@ -128,16 +189,18 @@ async def get_financial_summary(
             prev_year = current.year
             prev_month = current.month - 1
         
-        previous = db.query(MonthlyFinancials).filter(
+        result = await read_db.execute(select(MonthlyFinancials).where(
             MonthlyFinancials.year == prev_year,
             MonthlyFinancials.month == prev_month
-        ).first()
+        ))
+        previous = result.scalars().first()
         
         # Calculate year-to-date
-        ytd_records = db.query(MonthlyFinancials).filter(
+        result = await read_db.execute(select(MonthlyFinancials).where(
             MonthlyFinancials.year == current.year,
             MonthlyFinancials.month <= current.month
-        ).all()
+        ))
+        ytd_records = result.scalars().all()
         
         ytd_profit = sum(record.monthly_profit for record in ytd_records)
         ytd_revenue = sum(record.monthly_revenue for record in ytd_records)
@@ -161,12 +224,13 @@ async def get_financial_summary(
     current_month = now.month
     
     # Current month
-    current_orders = db.query(Order).filter(
+    result = await read_db.execute(select(Order).where(
         Order.created_by == current_user.id,
         Order.status == OrderStatus.COMPLETED,
         extract('year', Order.updated_at) == current_year,
         extract('month', Order.updated_at) == current_month
-    ).all()
+    ))
+    current_orders = result.scalars().all()
     
     monthly_profit = sum(float(order.profit) for order in current_orders if order.profit is not None)  # type: ignore
     monthly_revenue = sum(float(order.price) for order in current_orders if order.price is not None)  # type: ignore
@@ -179,31 +243,34 @@ async def get_financial_summary(
         prev_year = current_year
         prev_month = current_month - 1
     
-    prev_orders = db.query(Order).filter(
+    result = await read_db.execute(select(Order).where(
         Order.created_by == current_user.id,
         Order.status == OrderStatus.COMPLETED,
         extract('year', Order.updated_at) == prev_year,
         extract('month', Order.updated_at) == prev_month
-    ).all()
+    ))
+    prev_orders = result.scalars().all()
     
     prev_profit = sum(float(order.profit) for order in prev_orders if order.profit is not None)  # type: ignore
     prev_revenue = sum(float(order.price) for order in prev_orders if order.price is not None)  # type: ignore
     
     # Year-to-date
-    ytd_orders = db.query(Order).filter(
+    result = await read_db.execute(select(Order).where(
         Order.created_by == current_user.id,
         Order.status == OrderStatus.COMPLETED,
         extract('year', Order.updated_at) == current_year
-    ).all()
+    ))
+    ytd_orders = result.scalars().all()
     
     ytd_profit = sum(float(order.profit) for order in ytd_orders if order.profit is not None)  # type: ignore
     ytd_revenue = sum(float(order.price) for order in ytd_orders if order.price is not None)  # type: ignore
     
     # Overall capital
-    all_completed = db.query(Order).filter(
+    result = await read_db.execute(select(Order).where(
         Order.created_by == current_user.id,
         Order.status == OrderStatus.COMPLETED
-    ).all()
+    ))
+    all_completed = result.scalars().all()
     
     overall_capital = sum(float(order.profit) for order in all_completed if order.profit is not None)  # type: ignore
     
@@ -226,8 +293,8 @@ async def get_financial_history(
     year: Optional[int] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(12, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get historical financial data (admin only - returns system-wide data)"""
     # Only admins can view historical monthly financials
@@ -237,15 +304,16 @@ async def get_financial_history(
             detail="Only administrators can view historical financial records"
         )
     
-    query = db.query(MonthlyFinancials)
+    query = select(MonthlyFinancials)
     
     if year:
-        query = query.filter(MonthlyFinancials.year == year)
+        query = query.where(MonthlyFinancials.year == year)
     
-    financials = query.order_by(
+    result = await db.execute(query.order_by(
         MonthlyFinancials.year.desc(),
         MonthlyFinancials.month.desc()
-    ).offset(skip).limit(limit).all()
+    ).offset(skip).limit(limit))
+    financials = result.scalars().all()
     
     return financials
 
@@ -254,8 +322,8 @@ async def get_financial_history(
 async def get_specific_month(
     year: int,
     month: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get specific month's financial data (admin only)"""
     # Only admins can view specific monthly financials
@@ -271,10 +339,11 @@ async def get_specific_month(
             detail="Month must be between 1 and 12"
         )
     
-    financials = db.query(MonthlyFinancials).filter(
+    result = await db.execute(select(MonthlyFinancials).where(
         MonthlyFinancials.year == year,
         MonthlyFinancials.month == month
-    ).first()
+    ))
+    financials = result.scalars().first()
     
     if not financials:
         raise HTTPException(
@@ -287,8 +356,8 @@ async def get_specific_month(
 
 @router.post("/reset", response_model=MonthlyFinancialsResponse)
 async def reset_monthly_financials(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """
     Manually trigger monthly reset (admin only)
@@ -301,11 +370,22 @@ async def reset_monthly_financials(
             detail="Only administrators can reset monthly financials"
         )
     
-    current = get_or_create_current_month(db)
-    
-    # Add monthly profit to overall capital
-    current.overall_capital += current.monthly_profit  # type: ignore
-    current.reset_at = datetime.now()  # type: ignore
+    current = await get_or_create_current_month(db)
+    if shards_enabled():
+        await fold_shards(db, current.id)
+    
+    # Add monthly profit to overall capital, in the database so concurrent changes aren't lost
+    result = await db.execute(
+        update(MonthlyFinancials)
+        .where(MonthlyFinancials.id == current.id)
+        .values(
+            overall_capital=MonthlyFinancials.overall_capital + MonthlyFinancials.monthly_profit,
+            reset_at=datetime.now()
+        )
+        .returning(MonthlyFinancials.overall_capital)
+        .execution_options(synchronize_session=False)
+    )
+    overall_capital = result.scalar_one()
     
     # Create next month's record
     now = datetime.now()
@@ -317,10 +397,11 @@ async def reset_monthly_financials(
         next_month = now.month + 1
     
     # Check if next month already exists
-    next_financials = db.query(MonthlyFinancials).filter(
+    result = await db.execute(select(MonthlyFinancials).where(
         MonthlyFinancials.year == next_year,
         MonthlyFinancials.month == next_month
-    ).first()
+    ))
+    next_financials = result.scalars().first()
     
     if not next_financials:
         next_financials = MonthlyFinancials(
@@ -328,12 +409,12 @@ async def reset_monthly_financials(
             month=next_month,
             monthly_profit=0.0,
             monthly_revenue=0.0,
-            overall_capital=current.overall_capital
+            overall_capital=overall_capital
         )
         db.add(next_financials)
     
-    db.commit()
-    db.refresh(current)
+    await db.commit()
+    await db.refresh(current)
     
     return current
 
@@ -341,8 +422,8 @@ async def reset_monthly_financials(
 @router.put("/adjust", response_model=MonthlyFinancialsResponse)
 async def adjust_financials(
     adjustment: MonthlyFinancialsUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Manually adjust current month's financials (admin only)"""
     # Only admins can adjust financials
@@ -352,14 +433,17 @@ async def adjust_financials(
             detail="Only administrators can adjust financials"
         )
     
-    financials = get_or_create_current_month(db)
+    financials = await get_or_create_current_month(db)
+    if shards_enabled():
+        # Fold first, so the adjusted values aren't offset by deltas still in shard rows
+        await fold_shards(db, financials.id)
     
     update_data = adjustment.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(financials, field, value)
     
-    db.commit()
-    db.refresh(financials)
+    await db.commit()
+    await db.refresh(financials)
     
     return financials
 
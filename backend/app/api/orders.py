@@ -1,17 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, insert, update, func, lambda_stmt, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import datetime
+import csv
+import io
+import json
 
-from ..core import get_db
+from ..core import get_db, get_read_db
+from ..core.database import AsyncSessionLocal, ReadSessionLocal, get_client_key, is_pinned_to_primary
 from ..models import Order, Client, User, OrderStatus, MonthlyFinancials, UserRole
-from ..schemas import OrderCreate, OrderUpdate, OrderResponse, OrderWithClient
-from .auth import get_current_user, get_user_filter
-from .financials import get_or_create_current_month
+from ..schemas import (
+    OrderCreate,
+    OrderUpdate,
+    OrderResponse,
+    OrderWithClient,
+    OrderBulkCreate,
+    OrderBulkResult,
+    OrderBulkComplete,
+    OrderBulkStatusUpdate,
+    OrderBulkStatusResult
+)
+from .auth import TokenPrincipal, get_current_principal, get_user_filter
+from .financials import get_or_create_current_month, increment_month, debit_month, get_month_balance
+from ..core.instrumentation import query_budget
+from ..core.pagination import encode_cursor, decode_cursor
+from ..core.idempotency import IdempotentRequest, idempotency_key
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+# The users table joined twice, for the creator and the assignee names
+CreatorUser = aliased(User)
+AssignedUser = aliased(User)
+
+# Largest batch accepted by POST /orders/bulk
+BULK_ORDER_LIMIT = 500
+
+# Rows fetched from the database and encoded per chunk of GET /orders/export
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
 
 def build_order_dict(order, client_name, client_phone, client_location, client_email=None, created_by_username=None, assigned_to_username=None):
     """Helper function to build order dictionary with all fields"""
@@ -40,194 +71,309 @@ def build_order_dict(order, client_name, client_phone, client_location, client_e
     }
 
 
-@router.get("/", response_model=List[OrderWithClient])
-async def get_orders(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100),
-    status_filter: Optional[OrderStatus] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get all orders with optional status filter"""
-    # Create aliases for the User table to join twice
-    CreatorUser = db.query(User).subquery()
-    AssignedUser = db.query(User).subquery()
-    
-    query = db.query(
-        Order,
+class OrderFilters:
+    """Optional filters shared by the order list routes, read from query parameters"""
+    
+    def __init__(
+        self,
+        status: Optional[List[OrderStatus]] = Query(None, description="One or more statuses"),
+        client_id: Optional[int] = None,
+        assigned_to: Optional[int] = None,
+        created_by: Optional[int] = None,
+        created_from: Optional[datetime] = Query(None, description="Orders created at or after this time"),
+        created_to: Optional[datetime] = Query(None, description="Orders created before this time"),
+        min_profit: Optional[float] = None,
+        max_profit: Optional[float] = None
+    ):
+        self.statuses = status
+        self.client_id = client_id
+        self.assigned_to = assigned_to
+        self.created_by = created_by
+        self.created_from = created_from
+        self.created_to = created_to
+        self.min_profit = min_profit
+        self.max_profit = max_profit
+
+
+def order_list_query(
+    user_filter: Optional[int],
+    filters: OrderFilters,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[Tuple[Optional[datetime], int]] = None
+) -> StatementLambdaElement:
+    """Order columns with their client and user names, newest first, cached as a lambda statement; all rows without a limit"""
+    # Only the columns of the response are selected, so no Order entities are built per row
+    query = lambda_stmt(lambda: select(
+        Order.id,
+        Order.client_id,
+        Order.order_name,
+        Order.order_link,
+        Order.quantity,
+        Order.cost,
+        Order.customer_price,
+        Order.taxes,
+        Order.profit,
+        Order.status,
+        Order.created_at,
+        Order.updated_at,
+        Order.completed_at,
+        Order.created_by,
+        Order.assigned_to,
         Client.name.label("client_name"),
         Client.phone.label("client_phone"),
         Client.location.label("client_location"),
         Client.email.label("client_email"),
-        CreatorUser.c.username.label("created_by_username"),
-        AssignedUser.c.username.label("assigned_to_username")
+        CreatorUser.username.label("created_by_username"),
+        AssignedUser.username.label("assigned_to_username")
     ).join(Client, Order.client_id == Client.id
-    ).outerjoin(CreatorUser, Order.created_by == CreatorUser.c.id
-    ).outerjoin(AssignedUser, Order.assigned_to == AssignedUser.c.id)
+    ).outerjoin(CreatorUser, Order.created_by == CreatorUser.id
+    ).outerjoin(AssignedUser, Order.assigned_to == AssignedUser.id))
     
-    # Apply role-based filtering
-    user_filter = get_user_filter(current_user)
+    # Regular users see orders they created OR orders assigned to them
     if user_filter is not None:
-        # Regular users see orders they created OR orders assigned to them
-        from sqlalchemy import or_
-        query = query.filter(
-            or_(
-                Order.created_by == user_filter,
-                Order.assigned_to == user_filter
-            )
-        )
-    
-    if status_filter:
-        query = query.filter(Order.status == status_filter)
-    
-    results = query.offset(skip).limit(limit).all()
+        query += lambda s: s.where(or_(
+            Order.created_by == user_filter,
+            Order.assigned_to == user_filter
+        ))
+    
+    statuses = filters.statuses
+    if statuses:
+        if len(statuses) == 1:
+            status_filter = statuses[0]
+            query += lambda s: s.where(Order.status == status_filter)
+        else:
+            query += lambda s: s.where(Order.status.in_(statuses))
+    
+    client_id = filters.client_id
+    if client_id is not None:
+        query += lambda s: s.where(Order.client_id == client_id)
+    
+    assigned_to = filters.assigned_to
+    if assigned_to is not None:
+        query += lambda s: s.where(Order.assigned_to == assigned_to)
+    
+    created_by = filters.created_by
+    if created_by is not None:
+        query += lambda s: s.where(Order.created_by == created_by)
+    
+    created_from = filters.created_from
+    if created_from is not None:
+        query += lambda s: s.where(Order.created_at >= created_from)
+    
+    created_to = filters.created_to
+    if created_to is not None:
+        query += lambda s: s.where(Order.created_at < created_to)
+    
+    min_profit = filters.min_profit
+    if min_profit is not None:
+        query += lambda s: s.where(Order.profit >= min_profit)
+    
+    max_profit = filters.max_profit
+    if max_profit is not None:
+        query += lambda s: s.where(Order.profit <= max_profit)
+    
+    if cursor is not None:
+        cursor_created_at, cursor_id = cursor
+        # Compare against the cursor row's stored created_at, so the bound value's format never matters;
+        # the timestamp carried in the cursor is only used once that row has been deleted
+        query += lambda s: s.where(tuple_(Order.created_at, Order.id) < tuple_(
+            func.coalesce(select(Order.created_at).where(Order.id == cursor_id).scalar_subquery(), cursor_created_at),
+            cursor_id
+        ))
+    
+    query += lambda s: s.order_by(Order.created_at.desc(), Order.id.desc())
+    if limit is not None:
+        query += lambda s: s.offset(skip).limit(limit)
+    return query
+
+
+async def list_orders(
+    db: AsyncSession,
+    response: Response,
+    current_user: TokenPrincipal,
+    filters: OrderFilters,
+    skip: int,
+    limit: int,
+    cursor: Optional[str]
+) -> List[dict]:
+    """Run the order list query and build the response rows, with the next page's cursor in X-Next-Cursor"""
+    query = order_list_query(
+        get_user_filter(current_user),
+        filters,
+        skip,
+        limit,
+        decode_cursor(cursor) if cursor else None
+    )
+    result = await db.execute(query)
     
     orders = []
-    for order, client_name, client_phone, client_location, client_email, created_by_username, assigned_to_username in results:
-        orders.append(build_order_dict(order, client_name, client_phone, client_location, client_email, created_by_username, assigned_to_username))
-    
+    for row in result.all():
+        orders.append(build_order_dict(
+            row, row.client_name, row.client_phone, row.client_location, row.client_email,
+            row.created_by_username, row.assigned_to_username
+        ))
+    
+    # A short page is the last one
+    if len(orders) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(orders[-1]["created_at"], orders[-1]["id"])
     return orders
 
 
+@router.get("/", response_model=List[OrderWithClient], dependencies=[Depends(query_budget(2))])
+async def get_orders(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    status_filter: Optional[OrderStatus] = None,
+    filters: OrderFilters = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Get all orders, optionally filtered by status, client, users, creation date and profit"""
+    # status_filter predates the status list and is still accepted; sent together, both must match
+    if status_filter is not None:
+        if filters.statuses is not None and status_filter not in filters.statuses:
+            return []
+        filters.statuses = [status_filter]
+    return await list_orders(db, response, current_user, filters, skip, limit, cursor)
+
+
 @router.get("/pending", response_model=List[OrderWithClient])
 async def get_pending_orders(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    filters: OrderFilters = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get all pending orders"""
-    # Create aliases for the User table to join twice
-    CreatorUser = db.query(User).subquery()
-    AssignedUser = db.query(User).subquery()
-    
-    query = db.query(
-        Order,
-        Client.name.label("client_name"),
-        Client.phone.label("client_phone"),
-        Client.location.label("client_location"),
-        Client.email.label("client_email"),
-        CreatorUser.c.username.label("created_by_username"),
-        AssignedUser.c.username.label("assigned_to_username")
-    ).join(Client, Order.client_id == Client.id
-    ).outerjoin(CreatorUser, Order.created_by == CreatorUser.c.id
-    ).outerjoin(AssignedUser, Order.assigned_to == AssignedUser.c.id
-    ).filter(Order.status == OrderStatus.PENDING)
-    
-    # Apply role-based filtering
-    user_filter = get_user_filter(current_user)
-    if user_filter is not None:
-        # Regular users see orders they created OR orders assigned to them
-        from sqlalchemy import or_
-        query = query.filter(
-            or_(
-                Order.created_by == user_filter,
-                Order.assigned_to == user_filter
-            )
-        )
-    
-    results = query.offset(skip).limit(limit).all()
-    
-    orders = []
-    for order, client_name, client_phone, client_location, client_email, created_by_username, assigned_to_username in results:
-        orders.append(build_order_dict(order, client_name, client_phone, client_location, client_email, created_by_username, assigned_to_username))
-    
-    return orders
+    filters.statuses = [OrderStatus.PENDING]
+    return await list_orders(db, response, current_user, filters, skip, limit, cursor)
 
 
 @router.get("/completed", response_model=List[OrderWithClient])
 async def get_completed_orders(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    filters: OrderFilters = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get all completed orders"""
-    # Create aliases for the User table to join twice
-    CreatorUser = db.query(User).subquery()
-    AssignedUser = db.query(User).subquery()
-    
-    query = db.query(
-        Order,
-        Client.name.label("client_name"),
-        Client.phone.label("client_phone"),
-        Client.location.label("client_location"),
-        Client.email.label("client_email"),
-        CreatorUser.c.username.label("created_by_username"),
-        AssignedUser.c.username.label("assigned_to_username")
-    ).join(Client, Order.client_id == Client.id
-    ).outerjoin(CreatorUser, Order.created_by == CreatorUser.c.id
-    ).outerjoin(AssignedUser, Order.assigned_to == AssignedUser.c.id
-    ).filter(Order.status == OrderStatus.COMPLETED)
-    
-    # Apply role-based filtering
-    user_filter = get_user_filter(current_user)
-    if user_filter is not None:
-        # Regular users see orders they created OR orders assigned to them
-        from sqlalchemy import or_
-        query = query.filter(
-            or_(
-                Order.created_by == user_filter,
-                Order.assigned_to == user_filter
-            )
-        )
-    
-    results = query.offset(skip).limit(limit).all()
-    
-    orders = []
-    for order, client_name, client_phone, client_location, client_email, created_by_username, assigned_to_username in results:
-        orders.append(build_order_dict(order, client_name, client_phone, client_location, client_email, created_by_username, assigned_to_username))
-    
-    return orders
+    filters.statuses = [OrderStatus.COMPLETED]
+    return await list_orders(db, response, current_user, filters, skip, limit, cursor)
+
+
+def export_value(value):
+    """Plain CSV/JSON value of an order column"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, OrderStatus):
+        return value.value
+    return value
+
+
+async def stream_order_export(query: StatementLambdaElement, export_format: str, use_replica: bool) -> AsyncIterator[str]:
+    """Encode the export rows one batch at a time, read from a server-side cursor"""
+    # The request's session is closed before a streamed body is sent, so the export opens its own
+    session_factory = ReadSessionLocal if use_replica else AsyncSessionLocal
+    async with session_factory() as db:
+        result = await db.stream(query, execution_options={"yield_per": EXPORT_BATCH_SIZE})
+        columns = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(columns)
+        async for rows in result.partitions():
+            for row in rows:
+                values = [export_value(value) for value in row]
+                if export_format == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values))))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+
+@router.get("/export")
+async def export_orders(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filters: OrderFilters = Depends(),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """
+    Stream all matching orders with client and user names as CSV or NDJSON
+    - Takes the same filters as the order lists, newest first
+    - Rows are fetched in batches from a server-side cursor, so memory use does not grow with the export
+    """
+    query = order_list_query(get_user_filter(current_user), filters)
+    # Like get_read_db, a client that just wrote reads from the primary so its own changes are included
+    use_replica = ReadSessionLocal is not None and not is_pinned_to_primary(get_client_key(request))
+    return StreamingResponse(
+        stream_order_export(query, format, use_replica),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'}
+    )
 
 
 @router.get("/recent/list", response_model=List[OrderResponse])
 async def get_recent_orders(
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get most recent orders"""
-    query = db.query(Order)
+    query = select(Order)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
         # Regular users see orders they created OR orders assigned to them
-        from sqlalchemy import or_
-        query = query.filter(
+        query = query.where(
             or_(
                 Order.created_by == user_filter,
                 Order.assigned_to == user_filter
             )
         )
     
-    orders = query.order_by(Order.created_at.desc()).limit(limit).all()
+    result = await db.execute(query.order_by(Order.created_at.desc()).limit(limit))
+    orders = result.scalars().all()
     return orders
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get a specific order by ID"""
-    query = db.query(Order).filter(Order.id == order_id)
+    query = select(Order).where(Order.id == order_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
         # Regular users see orders they created OR orders assigned to them
-        from sqlalchemy import or_
-        query = query.filter(
+        query = query.where(
             or_(
                 Order.created_by == user_filter,
                 Order.assigned_to == user_filter
             )
         )
     
-    order = query.first()
+    result = await db.execute(query)
+    order = result.scalars().first()
     
     if not order:
         raise HTTPException(
@@ -238,26 +384,34 @@ async def get_order(
     return order
 
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+# Budgets of routes that touch the month row cover its first request of a month with sharding enabled
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(query_budget(14))])
 async def create_order(
     order_data: OrderCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal),
+    idempotency: IdempotentRequest = Depends(idempotency_key("orders.create"))
 ):
     """
     Create a new order
     - Calculates profit automatically
     - Deducts cost from overall capital
+    - A retry with the same Idempotency-Key returns the first response without creating another order
     """
+    replay = await idempotency.replay(db, current_user.id)
+    if replay is not None:
+        return replay
+    
     # Verify client exists and user has access to it
-    client_query = db.query(Client).filter(Client.id == order_data.client_id)
+    client_query = select(Client).where(Client.id == order_data.client_id)
     
     # Apply role-based filtering for client access
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        client_query = client_query.filter(Client.created_by == user_filter)
+        client_query = client_query.where(Client.created_by == user_filter)
     
-    client = client_query.first()
+    result = await db.execute(client_query)
+    client = result.scalars().first()
     if not client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -273,45 +427,211 @@ async def create_order(
     new_order.calculate_profit()
     
     # Get current month's financials
-    financials = get_or_create_current_month(db)
+    financials = await get_or_create_current_month(db)
+    
+    db.add(new_order)
+    await db.flush()
     
-    # Deduct cost from overall capital
-    if financials.overall_capital < new_order.cost:  # type: ignore
+    # Deduct cost from overall capital last, so the month row stays locked only until the commit
+    if not await debit_month(db, financials, "overall_capital", new_order.cost):  # type: ignore
+        available = await get_month_balance(db, financials, "overall_capital")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Insufficient capital. Available: ${financials.overall_capital:.2f}, Required: ${new_order.cost:.2f}"
+            detail=f"Insufficient capital. Available: ${available:.2f}, Required: ${new_order.cost:.2f}"
         )
     
-    financials.overall_capital -= new_order.cost  # type: ignore
-    
-    db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
-    db.refresh(financials)
+    await db.refresh(new_order)
+    idempotency.save(db, status.HTTP_201_CREATED, OrderResponse.model_validate(new_order))
+    replay = await idempotency.commit(db)
+    if replay is not None:
+        return replay
     
     return new_order
 
 
+@router.post("/bulk", response_model=OrderBulkResult, status_code=status.HTTP_201_CREATED, dependencies=[Depends(query_budget(10))])
+async def create_orders_bulk(
+    bulk_data: OrderBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """
+    Create many orders in one transaction
+    - Checks all clients and assignees with one query each
+    - Debits the total cost from overall capital once
+    - Orders with an inaccessible client or unknown assignee are rejected individually
+    """
+    items = bulk_data.orders
+    if not items or len(items) > BULK_ORDER_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Submit between 1 and {BULK_ORDER_LIMIT} orders"
+        )
+    
+    # Verify all clients exist and user has access to them
+    client_query = select(Client.id).where(Client.id.in_({item.client_id for item in items}))
+    user_filter = get_user_filter(current_user)
+    if user_filter is not None:
+        client_query = client_query.where(Client.created_by == user_filter)
+    result = await db.execute(client_query)
+    client_ids = set(result.scalars().all())
+    
+    assignee_ids = {item.assigned_to for item in items if item.assigned_to is not None}
+    user_ids = set()
+    if assignee_ids:
+        result = await db.execute(select(User.id).where(User.id.in_(assignee_ids)))
+        user_ids = set(result.scalars().all())
+    
+    results: List[dict] = []
+    rows = []
+    for index, item in enumerate(items):
+        if item.client_id not in client_ids:
+            results.append({"index": index, "created": False, "detail": "Client not found or you don't have access to it"})
+        elif item.assigned_to is not None and item.assigned_to not in user_ids:
+            results.append({"index": index, "created": False, "detail": "Assigned user not found"})
+        else:
+            row = item.model_dump()
+            row['created_by'] = current_user.id
+            row['profit'] = Order.compute_profit(item.customer_price, item.cost, item.taxes)
+            rows.append(row)
+            results.append({"index": index, "created": True})
+    
+    total_cost = sum(row['cost'] for row in rows)
+    if rows:
+        financials = await get_or_create_current_month(db)
+        
+        if db.bind.dialect.name == "sqlite":
+            # One multi-row INSERT ... RETURNING; SQLite assigns ids in VALUES order, so sorting by id
+            # restores submission order (sort_by_parameter_order would insert row by row here)
+            result = await db.scalars(insert(Order).returning(Order), rows)
+            created_orders = iter(sorted(result.all(), key=lambda order: order.id))
+        else:
+            # Neither RETURNING order nor id order is guaranteed to follow VALUES order, so the rows
+            # are matched back to their parameters by SQLAlchemy
+            result = await db.scalars(insert(Order).returning(Order, sort_by_parameter_order=True), rows)
+            created_orders = iter(result.all())
+        
+        if not await debit_month(db, financials, "overall_capital", total_cost):
+            available = await get_month_balance(db, financials, "overall_capital")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient capital. Available: ${available:.2f}, Required: ${total_cost:.2f}"
+            )
+        await db.commit()
+        for item_result in results:
+            if item_result["created"]:
+                item_result["order"] = next(created_orders)
+    
+    return {
+        "created_count": len(rows),
+        "rejected_count": len(items) - len(rows),
+        "total_cost": total_cost,
+        "results": results
+    }
+
+
+async def transition_orders(
+    db: AsyncSession,
+    current_user: TokenPrincipal,
+    order_ids: List[int],
+    new_status: OrderStatus
+) -> dict:
+    """Move orders to a status in one UPDATE, adding newly completed orders to the month's totals"""
+    order_ids = list(dict.fromkeys(order_ids))
+    if not order_ids or len(order_ids) > BULK_ORDER_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Submit between 1 and {BULK_ORDER_LIMIT} order ids"
+        )
+    
+    completing = new_status == OrderStatus.COMPLETED
+    if completing:
+        # Looked up before any order changes, since creating the month commits
+        financials = await get_or_create_current_month(db)
+    
+    values = {"status": new_status}
+    if completing:
+        values["completed_at"] = datetime.utcnow()
+    
+    # Orders already in the status are left alone, so a repeated request changes nothing
+    query = update(Order).where(Order.id.in_(order_ids), Order.status != new_status)
+    
+    # Apply role-based filtering
+    user_filter = get_user_filter(current_user)
+    if user_filter is not None:
+        query = query.where(Order.created_by == user_filter)
+    
+    result = await db.execute(
+        query.values(values)
+        .returning(Order.id, Order.customer_price, Order.profit)
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.all()
+    
+    revenue_added = 0.0
+    profit_added = 0.0
+    if completing and updated:
+        revenue_added = sum(customer_price for _, customer_price, _ in updated)
+        profit_added = sum(profit or 0.0 for _, _, profit in updated)
+        await increment_month(db, financials, monthly_revenue=revenue_added, monthly_profit=profit_added)
+    
+    await db.commit()
+    
+    return {
+        "status": new_status,
+        "requested_count": len(order_ids),
+        "updated_count": len(updated),
+        "unchanged_count": len(order_ids) - len(updated),
+        "updated_ids": sorted(order_id for order_id, _, _ in updated),
+        "revenue_added": revenue_added,
+        "profit_added": profit_added
+    }
+
+
+@router.post("/complete", response_model=OrderBulkStatusResult, dependencies=[Depends(query_budget(8))])
+async def complete_orders(
+    bulk_data: OrderBulkComplete,
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """
+    Mark many orders as completed
+    - Adds their revenue and profit to the current month in one update
+    """
+    return await transition_orders(db, current_user, bulk_data.order_ids, OrderStatus.COMPLETED)
+
+
+@router.post("/status", response_model=OrderBulkStatusResult, dependencies=[Depends(query_budget(8))])
+async def update_orders_status(
+    bulk_data: OrderBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Move many orders to a status, with the same financial effects as updating them one by one"""
+    return await transition_orders(db, current_user, bulk_data.order_ids, bulk_data.status)
+
+
 @router.put("/{order_id}", response_model=OrderResponse)
 async def update_order(
     order_id: int,
     order_data: OrderUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """
     Update an order
     - Recalculates profit if cost, customer_price, or taxes change
     - Updates monthly financials when order is completed
     """
-    query = db.query(Order).filter(Order.id == order_id)
+    query = select(Order).where(Order.id == order_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Order.created_by == user_filter)
+        query = query.where(Order.created_by == user_filter)
     
-    order = query.first()
+    result = await db.execute(query)
+    order = result.scalars().first()
     
     if not order:
         raise HTTPException(
@@ -319,12 +639,16 @@ async def update_order(
             detail="Order not found"
         )
     
-    # Store old status
-    old_status = order.status
-    
     # Update only provided fields
     update_data = order_data.model_dump(exclude_unset=True)
     
+    completing = update_data.get("status") == OrderStatus.COMPLETED and order.status != OrderStatus.COMPLETED  # type: ignore
+    if completing:
+        # Looked up before any order changes, since creating the month commits
+        financials = await get_or_create_current_month(db)
+        # The status is written by the conditional UPDATE below, not by the ORM flush
+        del update_data["status"]
+    
     for field, value in update_data.items():
         setattr(order, field, value)
     
@@ -332,17 +656,19 @@ async def update_order(
     if any(field in update_data for field in ['cost', 'customer_price', 'taxes']):
         order.calculate_profit()
     
-    # If status is being changed to completed
-    if "status" in update_data and update_data["status"] == OrderStatus.COMPLETED and old_status != OrderStatus.COMPLETED:  # type: ignore
-        order.completed_at = datetime.utcnow()  # type: ignore
-        
-        # Update monthly financials
-        financials = get_or_create_current_month(db)
-        financials.monthly_revenue += order.customer_price  # type: ignore
-        financials.monthly_profit += order.profit  # type: ignore
+    if completing:
+        # Only the request that moves the order out of its old status credits the month, as in transition_orders
+        result = await db.execute(
+            update(Order)
+            .where(Order.id == order.id, Order.status != OrderStatus.COMPLETED)
+            .values(status=OrderStatus.COMPLETED, completed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            await increment_month(db, financials, monthly_revenue=order.customer_price, monthly_profit=order.profit or 0)
     
-    db.commit()
-    db.refresh(order)
+    await db.commit()
+    await db.refresh(order)
     
     return order
 
@@ -350,25 +676,25 @@ async def update_order(
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Delete an order"""
-    query = db.query(Order).filter(Order.id == order_id)
+    query = select(Order).where(Order.id == order_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
         # Regular users can delete orders they created OR orders assigned to them
-        from sqlalchemy import or_
-        query = query.filter(
+        query = query.where(
             or_(
                 Order.created_by == user_filter,
                 Order.assigned_to == user_filter
             )
         )
     
-    order = query.first()
+    result = await db.execute(query)
+    order = result.scalars().first()
     
     if not order:
         raise HTTPException(
@@ -376,8 +702,8 @@ async def delete_order(
             detail="Order not found"
         )
     
-    db.delete(order)
-    db.commit()
+    await db.delete(order)
+    await db.commit()
     
     return None
 
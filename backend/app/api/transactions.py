@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import select, func, extract, lambda_stmt
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from ..core import get_db
+from ..core import get_db, get_read_db
 from ..models import Transaction, User, TransactionType
 from ..schemas import TransactionCreate, TransactionUpdate, TransactionResponse
-from .auth import get_current_user, get_user_filter
+from .auth import TokenPrincipal, get_current_principal, get_user_filter
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
@@ -17,24 +17,27 @@ async def get_transactions(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     type_filter: Optional[TransactionType] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get all transactions with optional type filter"""
-    query = db.query(
+    # Lambda statement, so the joined query is only built and compiled once
+    query = lambda_stmt(lambda: select(
         Transaction,
         User.username.label("created_by_username")
-    ).outerjoin(User, Transaction.created_by == User.id)
+    ).outerjoin(User, Transaction.created_by == User.id))
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Transaction.created_by == user_filter)
+        query += lambda s: s.where(Transaction.created_by == user_filter)
     
     if type_filter:
-        query = query.filter(Transaction.type == type_filter)
+        query += lambda s: s.where(Transaction.type == type_filter)
     
-    results = query.order_by(Transaction.transaction_date.desc()).offset(skip).limit(limit).all()
+    query += lambda s: s.order_by(Transaction.transaction_date.desc()).offset(skip).limit(limit)
+    result = await db.execute(query)
+    results = result.all()
     
     transactions = []
     for transaction, created_by_username in results:
@@ -57,26 +60,26 @@ async def get_transactions(
 
 @router.get("/summary")
 async def get_transaction_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get transaction summary (total income, expenses, profit)"""
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     
-    income_query = db.query(func.sum(Transaction.amount)).filter(
+    income_query = select(func.sum(Transaction.amount)).where(
         Transaction.type == TransactionType.INCOME
     )
     if user_filter is not None:
-        income_query = income_query.filter(Transaction.created_by == user_filter)
-    income = income_query.scalar() or 0.0
+        income_query = income_query.where(Transaction.created_by == user_filter)
+    income = await db.scalar(income_query) or 0.0
     
-    expenses_query = db.query(func.sum(Transaction.amount)).filter(
+    expenses_query = select(func.sum(Transaction.amount)).where(
         Transaction.type == TransactionType.EXPENSE
     )
     if user_filter is not None:
-        expenses_query = expenses_query.filter(Transaction.created_by == user_filter)
-    expenses = expenses_query.scalar() or 0.0
+        expenses_query = expenses_query.where(Transaction.created_by == user_filter)
+    expenses = await db.scalar(expenses_query) or 0.0
     
     profit = income - expenses
     
@@ -91,8 +94,8 @@ async def get_transaction_summary(
 @router.get("/monthly")
 async def get_monthly_transactions(
     year: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get monthly transaction summary for charts"""
     if year is None:
@@ -101,29 +104,37 @@ async def get_monthly_transactions(
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     
+    # A range on transaction_date rather than extract('year', ...), so the (type, transaction_date) index applies
+    year_start = datetime(year, 1, 1)
+    next_year_start = datetime(year + 1, 1, 1)
+    
     # Get monthly income
-    income_query = db.query(
+    income_query = select(
         extract('month', Transaction.transaction_date).label('month'),
         func.sum(Transaction.amount).label('amount')
-    ).filter(
+    ).where(
         Transaction.type == TransactionType.INCOME,
-        extract('year', Transaction.transaction_date) == year
+        Transaction.transaction_date >= year_start,
+        Transaction.transaction_date < next_year_start
     )
     if user_filter is not None:
-        income_query = income_query.filter(Transaction.created_by == user_filter)
-    income_by_month = income_query.group_by(extract('month', Transaction.transaction_date)).all()
+        income_query = income_query.where(Transaction.created_by == user_filter)
+    result = await db.execute(income_query.group_by(extract('month', Transaction.transaction_date)))
+    income_by_month = result.all()
     
     # Get monthly expenses
-    expenses_query = db.query(
+    expenses_query = select(
         extract('month', Transaction.transaction_date).label('month'),
         func.sum(Transaction.amount).label('amount')
-    ).filter(
+    ).where(
         Transaction.type == TransactionType.EXPENSE,
-        extract('year', Transaction.transaction_date) == year
+        Transaction.transaction_date >= year_start,
+        Transaction.transaction_date < next_year_start
     )
     if user_filter is not None:
-        expenses_query = expenses_query.filter(Transaction.created_by == user_filter)
-    expenses_by_month = expenses_query.group_by(extract('month', Transaction.transaction_date)).all()
+        expenses_query = expenses_query.where(Transaction.created_by == user_filter)
+    result = await db.execute(expenses_query.group_by(extract('month', Transaction.transaction_date)))
+    expenses_by_month = result.all()
     
     # Create monthly data structure
     monthly_data = []
@@ -145,18 +156,19 @@ async def get_monthly_transactions(
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Get a specific transaction by ID"""
-    query = db.query(Transaction).filter(Transaction.id == transaction_id)
+    query = select(Transaction).where(Transaction.id == transaction_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Transaction.created_by == user_filter)
+        query = query.where(Transaction.created_by == user_filter)
     
-    transaction = query.first()
+    result = await db.execute(query)
+    transaction = result.scalars().first()
     
     if not transaction:
         raise HTTPException(
@@ -170,15 +182,15 @@ async def get_transaction(
 @router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     transaction_data: TransactionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Create a new transaction"""
     new_transaction = Transaction(**transaction_data.model_dump(), created_by=current_user.id)
     
     db.add(new_transaction)
-    db.commit()
-    db.refresh(new_transaction)
+    await db.commit()
+    await db.refresh(new_transaction)
     
     return new_transaction
 
@@ -187,18 +199,19 @@ async def create_transaction(
 async def update_transaction(
     transaction_id: int,
     transaction_data: TransactionUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Update a transaction"""
-    query = db.query(Transaction).filter(Transaction.id == transaction_id)
+    query = select(Transaction).where(Transaction.id == transaction_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Transaction.created_by == user_filter)
+        query = query.where(Transaction.created_by == user_filter)
     
-    transaction = query.first()
+    result = await db.execute(query)
+    transaction = result.scalars().first()
     
     if not transaction:
         raise HTTPException(
@@ -211,8 +224,8 @@ async def update_transaction(
     for field, value in update_data.items():
         setattr(transaction, field, value)
     
-    db.commit()
-    db.refresh(transaction)
+    await db.commit()
+    await db.refresh(transaction)
     
     return transaction
 
@@ -220,18 +233,19 @@ async def update_transaction(
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     """Delete a transaction"""
-    query = db.query(Transaction).filter(Transaction.id == transaction_id)
+    query = select(Transaction).where(Transaction.id == transaction_id)
     
     # Apply role-based filtering
     user_filter = get_user_filter(current_user)
     if user_filter is not None:
-        query = query.filter(Transaction.created_by == user_filter)
+        query = query.where(Transaction.created_by == user_filter)
     
-    transaction = query.first()
+    result = await db.execute(query)
+    transaction = result.scalars().first()
     
     if not transaction:
         raise HTTPException(
@@ -239,8 +253,8 @@ async def delete_transaction(
             detail="Transaction not found"
         )
     
-    db.delete(transaction)
-    db.commit()
+    await db.delete(transaction)
+    await db.commit()
     
     return None
 
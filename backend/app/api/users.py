@@ -1,33 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from ..core import get_db, get_password_hash
+from ..core import get_db, get_password_hash_async
 from ..models import User, UserRole
 from ..schemas import UserCreate, UserResponse, UserUpdate
-from .auth import get_current_user, require_admin
+from .auth import get_current_user, require_admin, revoke_tokens, user_changed
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """Get all users (admin only)"""
-    users = db.query(User).all()
+    result = await db.execute(select(User))
+    users = result.scalars().all()
     return users
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """Get a specific user by ID (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -39,26 +42,28 @@ async def get_user(
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """Create a new user (admin only)"""
     # Check if username exists
-    if db.query(User).filter(User.username == user_data.username).first():
+    result = await db.execute(select(User).where(User.username == user_data.username))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
     # Check if email exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -68,8 +73,9 @@ async def create_user(
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    user_changed(new_user)
     
     return new_user
 
@@ -78,20 +84,24 @@ async def create_user(
 async def update_user(
     user_id: int,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """Update a user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    # populate_existing: an admin editing their own account already has a cached copy of the row in the session
+    result = await db.execute(select(User).where(User.id == user_id).execution_options(populate_existing=True))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    previous_username = str(user.username)
     
     # Check if username is being changed and if it already exists
     if user_data.username and user_data.username != user.username:
-        if db.query(User).filter(User.username == user_data.username).first():
+        result = await db.execute(select(User).where(User.username == user_data.username))
+        if result.scalars().first():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already registered"
@@ -100,23 +110,28 @@ async def update_user(
     
     # Check if email is being changed and if it already exists
     if user_data.email and user_data.email != user.email:
-        if db.query(User).filter(User.email == user_data.email).first():
+        result = await db.execute(select(User).where(User.email == user_data.email))
+        if result.scalars().first():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
         user.email = user_data.email
     
-    # Update role if provided
-    if user_data.role is not None:
+    # Update role if provided; tokens carry the role, so existing ones are revoked
+    if user_data.role is not None and user_data.role != user.role:
         user.role = user_data.role
+        await revoke_tokens(db, user)
     
     # Update is_active if provided
     if user_data.is_active is not None:
+        if user.is_active and not user_data.is_active:
+            await revoke_tokens(db, user)
         user.is_active = user_data.is_active
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    user_changed(user, previous_username)
     
     return user
 
@@ -124,11 +139,12 @@ async def update_user(
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """Delete/deactivate a user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id).execution_options(populate_existing=True))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -144,7 +160,9 @@ async def delete_user(
     
     # Soft delete by deactivating the user
     user.is_active = False
-    db.commit()
+    await revoke_tokens(db, user)
+    await db.commit()
+    user_changed(user)
     
     return {"message": "User deactivated successfully"}
 
@@ -153,11 +171,12 @@ async def delete_user(
 async def reset_user_password(
     user_id: int,
     new_password: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """Reset a user's password (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id).execution_options(populate_existing=True))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -165,8 +184,10 @@ async def reset_user_password(
         )
     
     # Update password
-    user.hashed_password = get_password_hash(new_password)
-    db.commit()
+    user.hashed_password = await get_password_hash_async(new_password)
+    await revoke_tokens(db, user)
+    await db.commit()
+    user_changed(user)
     
     return {"message": "Password reset successfully"}
 
@@ -174,11 +195,12 @@ async def reset_user_password(
 @router.post("/{user_id}/activate")
 async def activate_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """Activate a deactivated user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id).execution_options(populate_existing=True))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -186,7 +208,8 @@ async def activate_user(
         )
     
     user.is_active = True
-    db.commit()
+    await db.commit()
+    user_changed(user)
     
     return {"message": "User activated successfully"}
 
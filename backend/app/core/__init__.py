@@ -1,21 +1,35 @@
 from .config import settings
-from .database import Base, engine, get_db
+from .database import Base, engine, async_engine, read_engine, AsyncSessionLocal, get_db, get_read_db
 from .security import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    verify_and_update_password_async,
+    get_password_hash_async,
     create_access_token,
-    decode_access_token
+    create_refresh_token,
+    decode_access_token,
+    decode_refresh_token
 )
 
 __all__ = [
     "settings",
     "Base",
     "engine",
+    "async_engine",
+    "read_engine",
+    "AsyncSessionLocal",
     "get_db",
+    "get_read_db",
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "verify_and_update_password_async",
+    "get_password_hash_async",
     "create_access_token",
-    "decode_access_token"
+    "create_refresh_token",
+    "decode_access_token",
+    "decode_refresh_token"
 ]
 
 # Made with Bob
@@ -1,19 +1,95 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./fastdropship.db"
+    READ_DATABASE_URL: Optional[str] = None  # Read replica for reporting queries
+    READ_AFTER_WRITE_PIN_SECONDS: float = 5.0  # Keep a client on the primary after it writes
+    
+    # Refuse to start when the database is not at the latest migration
+    SCHEMA_CHECK_ON_STARTUP: bool = True
+    
+    # Connection pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced, -1 to disable
+    DB_POOL_PRE_PING: bool = True
+    
+    # SQLite production profile (WAL, relaxed fsync, larger cache, mmap)
+    SQLITE_PRODUCTION_PROFILE: bool = False
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+    SQLITE_OPTIMIZE_INTERVAL: int = 3600  # Seconds between PRAGMA optimize runs per connection
+    
+    # Per-request SQL instrumentation (Server-Timing and X-DB-Queries headers)
+    SQL_INSTRUMENTATION: bool = True
+    SQL_REPEATED_QUERY_THRESHOLD: int = 10  # Executions of one statement in a request that suggest an N+1
+    SQL_QUERY_BUDGET_ENFORCE: bool = False  # Raise instead of logging when a route exceeds its query budget
+    
+    # Slow query log, disabled unless a threshold is set
+    SLOW_QUERY_THRESHOLD_MS: Optional[float] = None
+    SLOW_QUERY_LOG_FILE: str = "slow_queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10485760  # 10 MB per file
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
+    
+    # Authenticated user cache; entries are also dropped when the user is changed
+    USER_CACHE_TTL_SECONDS: float = 30.0  # 0 disables the cache
+    USER_CACHE_SIZE: int = 1024
+    
+    # Seconds between bulk reloads of users' token versions; revocations by other workers apply within this
+    TOKEN_VERSION_REFRESH_SECONDS: float = 5.0
+    
+    # Decoded access tokens by digest, kept until the token expires; 0 disables the cache
+    TOKEN_DECODE_CACHE_SIZE: int = 4096
+    
+    # Password hashing runs on a bounded pool: "thread" (bcrypt releases the GIL) or "process"
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    
+    # Password hash schemes; the first hashes new passwords, the rest still verify and are rehashed on login
+    PASSWORD_HASH_SCHEMES: str = "bcrypt"
+    PASSWORD_HASH_ROUNDS: Optional[int] = None  # Cost of the first scheme (bcrypt log2 rounds, argon2 time cost)
+    PASSWORD_HASH_MEMORY_COST: Optional[int] = None  # argon2 memory in KiB
+    
+    # Token-bucket rate limits as "requests/seconds", applied per client IP and per username or authenticated user
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN: str = "10/60"
+    RATE_LIMIT_REGISTER: str = "5/3600"
+    RATE_LIMIT_CHANGE_PASSWORD: str = "5/300"
+    RATE_LIMIT_STORE: Optional[str] = None  # SQLite file shared by all workers; per-process buckets when unset
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Buckets kept per process without a shared store
+    RATE_LIMIT_TRUSTED_PROXIES: int = 0  # Proxies in front of the app appending to X-Forwarded-For; 0 uses the peer address
+    
+    # Revoked refresh tokens are reloaded incrementally; rows past their expiry are compacted away
+    REVOKED_TOKEN_REFRESH_SECONDS: float = 5.0
+    REVOKED_TOKEN_COMPACT_SECONDS: float = 3600.0
+    
+    # Credits to the month's totals are spread over this many shard rows and folded back periodically; 1 writes the month row
+    FINANCIALS_SHARDS: int = 1
+    FINANCIALS_COMPACT_SECONDS: float = 10.0
+    
+    # Responses of money-moving POSTs sent with an Idempotency-Key are replayed for retries with the same key
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_CACHE_SIZE: int = 10000  # Stored responses kept in memory per process
+    IDEMPOTENCY_COMPACT_SECONDS: float = 3600.0
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000"
     
+    @property
+    def password_schemes_list(self) -> List[str]:
+        return [scheme.strip() for scheme in self.PASSWORD_HASH_SCHEMES.split(",")]
+    
     @property
     def origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
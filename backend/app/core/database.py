@@ -1,24 +1,283 @@
-from sqlalchemy import create_engine
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, List
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
+# Async drivers used by the application for each sync URL scheme
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+# Number of read-after-write pins kept before expired ones are purged
+MAX_WRITE_PINS = 10000
+
+# Upper bounds (in milliseconds) of the pool wait time histogram buckets
+POOL_WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Convert a sync DATABASE_URL into the equivalent async driver URL"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.drivername)
+    if driver is None:
+        return database_url
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+class PoolStats:
+    """Counters and wait time histogram for connection checkouts"""
+
+    def __init__(self, buckets_ms: List[float]):
+        self._lock = threading.Lock()
+        self.buckets_ms = buckets_ms
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.exhausted = 0
+            self.timeouts = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.bucket_counts = [0] * (len(self.buckets_ms) + 1)
+
+    def record_wait(self, wait_ms: float, exhausted: bool, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if exhausted:
+                self.exhausted += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            for index, bound in enumerate(self.buckets_ms):
+                if wait_ms <= bound:
+                    self.bucket_counts[index] += 1
+                    break
+            else:
+                self.bucket_counts[-1] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            histogram = {f"le_{bound}ms": count for bound, count in zip(self.buckets_ms, self.bucket_counts)}
+            histogram["le_inf"] = self.bucket_counts[-1]
+            waits = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "exhausted": self.exhausted,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": self.wait_total_ms / waits if waits else 0.0,
+                "wait_max_ms": self.wait_max_ms,
+                "wait_histogram": histogram,
+            }
+
+
+pool_stats = PoolStats(POOL_WAIT_BUCKETS_MS)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        exhausted = self.checkedin() == 0 and self._max_overflow > -1 and self._overflow >= self._max_overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            pool_stats.record_wait((time.perf_counter() - start) * 1000, exhausted, timed_out=True)
+            logger.error("Database pool exhausted, checkout timed out: %s", self.status())
+            raise
+        wait_ms = (time.perf_counter() - start) * 1000
+        pool_stats.record_wait(wait_ms, exhausted)
+        if exhausted:
+            logger.warning("Database pool exhausted, waited %.1fms for a connection: %s", wait_ms, self.status())
+        return connection
+
+
+def get_pool_status() -> dict:
+    """Current state of the API connection pool plus checkout statistics"""
+    pool = async_engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "timeout": settings.DB_POOL_TIMEOUT,
+        })
+    status.update(pool_stats.snapshot())
+    status["read_replica"] = read_engine is not None
+    return status
+
+
+def get_sqlite_pragmas() -> List[str]:
+    """PRAGMA statements applied to each new SQLite connection"""
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Apply the production pragmas when a pooled connection is opened"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in get_sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+    connection_record.info["optimized_at"] = time.monotonic()
+
+
+def optimize_sqlite_connection(dbapi_connection, connection_record, connection_proxy):
+    """Run PRAGMA optimize on long-lived connections every SQLITE_OPTIMIZE_INTERVAL seconds"""
+    optimized_at = connection_record.info.get("optimized_at", 0.0)
+    if time.monotonic() - optimized_at < settings.SQLITE_OPTIMIZE_INTERVAL:
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA optimize")
+    finally:
+        cursor.close()
+    connection_record.info["optimized_at"] = time.monotonic()
+
+
+def use_sqlite_production_profile(sync_engine):
+    """Register the SQLite production profile on an engine"""
+    event.listen(sync_engine, "connect", configure_sqlite_connection)
+    event.listen(sync_engine, "checkout", optimize_sqlite_connection)
+
+
+connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+
+pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+# Sync engine, used by scripts and migrations
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args=connect_args,
+    **pool_options
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine, used by the API so queries don't block the event loop
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    connect_args=connect_args,
+    poolclass=InstrumentedQueuePool,
+    **pool_options
+)
+
+# Optional read replica engine for list and reporting queries
+read_engine = create_async_engine(
+    get_async_database_url(settings.READ_DATABASE_URL),
+    connect_args=connect_args,
+    poolclass=AsyncAdaptedQueuePool,
+    **pool_options
+) if settings.READ_DATABASE_URL else None
+
+if settings.SQLITE_PRODUCTION_PROFILE and engine.dialect.name == "sqlite":
+    use_sqlite_production_profile(engine)
+    use_sqlite_production_profile(async_engine.sync_engine)
+    if read_engine is not None:
+        use_sqlite_production_profile(read_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+) if read_engine is not None else None
+
 Base = declarative_base()
 
+# Client key -> monotonic time until which its reads go to the primary
+_write_pins: Dict[str, float] = {}
 
-def get_db():
+
+def get_client_key(request: Request) -> str:
+    """Identify the caller by bearer token, falling back to the client address"""
+    credentials = request.headers.get("authorization")
+    if not credentials:
+        credentials = request.client.host if request.client else ""
+    return hashlib.sha1(credentials.encode()).hexdigest()
+
+
+def pin_to_primary(client_key: str):
+    """Route a client's reads to the primary for READ_AFTER_WRITE_PIN_SECONDS"""
+    now = time.monotonic()
+    if len(_write_pins) >= MAX_WRITE_PINS:
+        for key, expires in list(_write_pins.items()):
+            if expires <= now:
+                _write_pins.pop(key, None)
+    _write_pins[client_key] = now + settings.READ_AFTER_WRITE_PIN_SECONDS
+
+
+def is_pinned_to_primary(client_key: str) -> bool:
+    """Whether a client wrote recently enough that a replica may be stale for it"""
+    expires = _write_pins.get(client_key)
+    return expires is not None and expires > time.monotonic()
+
+
+def insert_on_conflict(db: AsyncSession, table):
+    """INSERT for the session's database, supporting on_conflict_do_nothing / on_conflict_do_update"""
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(table)
+
+
+async def get_db(request: Request):
     """Dependency for getting database session"""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
+        if read_engine is not None:
+            client_key = get_client_key(request)
+            event.listen(db.sync_session, "after_commit", lambda session: pin_to_primary(client_key))
         yield db
-    finally:
-        db.close()
+
+
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)):
+    """Dependency for read-only routes, served by the read replica when one is configured"""
+    if ReadSessionLocal is None or is_pinned_to_primary(get_client_key(request)):
+        yield db
+        return
+    async with ReadSessionLocal() as read_db:
+        yield read_db
 
 # Made with Bob
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .config import settings
+from .database import async_engine, insert_on_conflict
+from ..models import MonthlyFinancials, MonthlyFinancialsShard
+
+logger = logging.getLogger(__name__)
+
+# Month totals that shard rows hold deltas for
+SHARDED_COLUMNS = ("monthly_profit", "monthly_revenue", "overall_capital")
+
+
+def shards_enabled() -> bool:
+    return settings.FINANCIALS_SHARDS > 1
+
+
+def shard_total(financials_id: int, name: str):
+    """Scalar subquery summing one column over a month's shard rows"""
+    return (
+        select(func.coalesce(func.sum(getattr(MonthlyFinancialsShard, name)), 0.0))
+        .where(MonthlyFinancialsShard.financials_id == financials_id)
+        .scalar_subquery()
+    )
+
+
+async def add_to_shard(db, financials_id: int, deltas: Dict[str, float]):
+    """Upsert deltas into a randomly picked shard row of a month, so concurrent writers rarely share a row"""
+    table = MonthlyFinancialsShard.__table__
+    statement = insert_on_conflict(db, table).values(
+        financials_id=financials_id,
+        shard=random.randrange(settings.FINANCIALS_SHARDS),
+        **{name: deltas.get(name, 0.0) for name in SHARDED_COLUMNS}
+    )
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.financials_id, table.c.shard],
+        set_={name: table.c[name] + statement.excluded[name] for name in deltas}
+    ))
+
+
+async def apply_shard_totals(db, financials: MonthlyFinancials):
+    """Add a month's unfolded shard deltas to its loaded totals without marking it changed"""
+    result = await db.execute(
+        select(*(func.coalesce(func.sum(getattr(MonthlyFinancialsShard, name)), 0.0) for name in SHARDED_COLUMNS))
+        .where(MonthlyFinancialsShard.financials_id == financials.id)
+    )
+    for name, delta in zip(SHARDED_COLUMNS, result.one()):
+        set_committed_value(financials, name, getattr(financials, name) + delta)
+
+
+async def fold_shards(db, financials_id: Optional[int] = None) -> int:
+    """Move shard deltas into their month rows in the caller's transaction; returns the shard rows folded"""
+    query = delete(MonthlyFinancialsShard).returning(
+        MonthlyFinancialsShard.financials_id,
+        *(getattr(MonthlyFinancialsShard, name) for name in SHARDED_COLUMNS)
+    )
+    if financials_id is not None:
+        query = query.where(MonthlyFinancialsShard.financials_id == financials_id)
+    # DELETE ... RETURNING reports each row as last written, so increments racing the fold are not lost
+    result = await db.execute(query.execution_options(synchronize_session=False))
+    rows = result.all()
+    totals: Dict[int, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(SHARDED_COLUMNS, 0.0))
+    for month_id, *deltas in rows:
+        for name, delta in zip(SHARDED_COLUMNS, deltas):
+            totals[month_id][name] += delta
+    for month_id, sums in totals.items():
+        await db.execute(
+            update(MonthlyFinancials)
+            .where(MonthlyFinancials.id == month_id)
+            .values({name: getattr(MonthlyFinancials, name) + delta for name, delta in sums.items()})
+            .execution_options(synchronize_session=False)
+        )
+    return len(rows)
+
+
+class FinancialShardCompactor:
+    """Background task folding shard rows into their month rows every interval"""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def compact(self) -> int:
+        async with async_engine.begin() as conn:
+            return await fold_shards(conn)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.compact()
+            except Exception:
+                logger.exception("Folding financial shards failed")
+
+    async def shard_rows_exist(self) -> bool:
+        async with async_engine.connect() as conn:
+            result = await conn.execute(select(MonthlyFinancialsShard.id).limit(1))
+            return result.first() is not None
+
+    async def start(self):
+        """Fold rows left by an earlier run, then keep folding while sharding is enabled"""
+        # Without sharding there is usually nothing to fold; skip the DELETE unless a sharded run left rows
+        if shards_enabled() or await self.shard_rows_exist():
+            await self.compact()
+        if shards_enabled() and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the task and fold what it had not reached yet"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.compact()
+
+
+financial_shard_compactor = FinancialShardCompactor(settings.FINANCIALS_COMPACT_SECONDS)
+
+# Made with Bob
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple, Optional, Tuple
+
+from fastapi import Header, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import TTLCache
+from .config import settings
+from .database import async_engine
+from ..models import IdempotencyKey
+
+# Header set on responses replayed from an earlier request with the same key
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: int
+    body: str
+    expires_at: datetime
+
+
+class IdempotencyStore:
+    """Responses stored per (user, route, key) in the idempotency_keys table, behind an in-process LRU"""
+
+    def __init__(self, cache_size: int, ttl_seconds: float, compact_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.compact_seconds = compact_seconds
+        self.cache = TTLCache(cache_size, ttl_seconds)
+        self._compacted_at: Optional[float] = None
+
+    async def get(self, db: AsyncSession, cache_key: Tuple[int, str, str]) -> Optional[StoredResponse]:
+        stored = self.cache.get(cache_key)
+        if stored is not None:
+            return stored
+        user_id, scope, key = cache_key
+        result = await db.execute(
+            select(
+                IdempotencyKey.id,
+                IdempotencyKey.request_hash,
+                IdempotencyKey.status_code,
+                IdempotencyKey.response_body,
+                IdempotencyKey.expires_at
+            ).where(IdempotencyKey.user_id == user_id, IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        if row.expires_at <= datetime.utcnow():
+            # Free the key for this request instead of waiting for the row to be compacted
+            await db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == row.id))
+            return None
+        stored = StoredResponse(row.request_hash, row.status_code, row.response_body, row.expires_at)
+        self.remember(cache_key, stored)
+        return stored
+
+    def add(self, db: AsyncSession, cache_key: Tuple[int, str, str], stored: StoredResponse):
+        user_id, scope, key = cache_key
+        db.add(IdempotencyKey(
+            user_id=user_id,
+            scope=scope,
+            key=key,
+            request_hash=stored.request_hash,
+            status_code=stored.status_code,
+            response_body=stored.body,
+            expires_at=stored.expires_at
+        ))
+
+    def remember(self, cache_key: Tuple[int, str, str], stored: StoredResponse):
+        self.cache.set(cache_key, stored, (stored.expires_at - datetime.utcnow()).total_seconds())
+
+    async def compact(self):
+        """Delete expired keys, at most once per IDEMPOTENCY_COMPACT_SECONDS"""
+        now = time.monotonic()
+        if self._compacted_at is not None and now - self._compacted_at < self.compact_seconds:
+            return
+        self._compacted_at = now
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+
+
+idempotency_store = IdempotencyStore(
+    settings.IDEMPOTENCY_CACHE_SIZE,
+    settings.IDEMPOTENCY_KEY_TTL_HOURS * 3600,
+    settings.IDEMPOTENCY_COMPACT_SECONDS
+)
+
+
+class IdempotentRequest:
+    """The optional Idempotency-Key of a request; call replay() before doing any work"""
+
+    def __init__(self, scope: str, key: Optional[str], request_hash: str):
+        self.scope = scope
+        self.key = key
+        self.request_hash = request_hash
+        self._cache_key: Optional[Tuple[int, str, str]] = None
+        self._pending: Optional[StoredResponse] = None
+
+    async def replay(self, db: AsyncSession, user_id: int) -> Optional[JSONResponse]:
+        """Stored response of an earlier request with this key, or None when the request should run"""
+        if self.key is None:
+            return None
+        self._cache_key = (user_id, self.scope, self.key)
+        stored = await idempotency_store.get(db, self._cache_key)
+        if stored is None:
+            return None
+        if stored.request_hash != self.request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        return JSONResponse(
+            status_code=stored.status_code,
+            content=json.loads(stored.body),
+            headers={REPLAYED_HEADER: "true"}
+        )
+
+    def save(self, db: AsyncSession, status_code: int, response: Any):
+        """Store the response in the session, so it commits together with the request's changes"""
+        if self._cache_key is None:
+            return
+        self._pending = StoredResponse(
+            self.request_hash,
+            status_code,
+            json.dumps(jsonable_encoder(response)),
+            datetime.utcnow() + timedelta(seconds=idempotency_store.ttl_seconds)
+        )
+        idempotency_store.add(db, self._cache_key, self._pending)
+
+    async def commit(self, db: AsyncSession) -> Optional[JSONResponse]:
+        """Commit the request; if a concurrent retry committed first, roll back and return its response"""
+        if self._pending is None:
+            await db.commit()
+            return None
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            replay = await self.replay(db, self._cache_key[0])
+            if replay is None:
+                raise
+            return replay
+        idempotency_store.remember(self._cache_key, self._pending)
+        await idempotency_store.compact()
+        return None
+
+
+def hash_request_body(body: bytes) -> str:
+    """Hash of a request body, taken over canonical JSON so key order and whitespace don't count"""
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+    except ValueError:
+        canonical = body
+    return hashlib.sha256(canonical).hexdigest()
+
+
+def idempotency_key(scope: str):
+    """Dependency reading the optional Idempotency-Key header of a route that moves money"""
+    async def get_idempotent_request(
+        request: Request,
+        idempotency_key: Optional[str] = Header(None, max_length=255)
+    ) -> IdempotentRequest:
+        body = await request.body()
+        return IdempotentRequest(scope, idempotency_key, hash_request_body(body))
+    return get_idempotent_request
+
+# Made with Bob
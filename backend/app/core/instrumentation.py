@@ -0,0 +1,131 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .database import async_engine, read_engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a route issues more statements than its declared budget"""
+
+
+class RequestQueryStats:
+    """SQL statements issued while handling one request"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.count = 0
+        self.duration_ms = 0.0
+        self.budget: Optional[int] = None
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.duration_ms += duration_ms
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(statement, count) for statement, count in self.statements.items() if count >= threshold]
+
+    @property
+    def route(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def get_request_stats() -> Optional[RequestQueryStats]:
+    """Statistics of the request being handled, if any"""
+    return _request_stats.get()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _request_stats.get() is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    started_at = getattr(context, "_query_started_at", None)
+    if stats is not None and started_at is not None:
+        stats.record(statement, (time.perf_counter() - started_at) * 1000)
+
+
+def instrument_engine(sync_engine):
+    """Count statements and time spent in the database for the current request"""
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+def query_budget(max_queries: int):
+    """Dependency declaring how many statements a route may issue per request"""
+    async def set_query_budget():
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.budget = max_queries
+    return set_query_budget
+
+
+def check_request_stats(stats: RequestQueryStats):
+    """Warn about repeated statements and routes over their query budget"""
+    for statement, count in stats.repeated_statements(settings.SQL_REPEATED_QUERY_THRESHOLD):
+        logger.warning(
+            "Possible N+1 in %s: statement executed %d times: %s",
+            stats.route, count, " ".join(statement.split())[:300]
+        )
+    if stats.budget is not None and stats.count > stats.budget:
+        message = f"{stats.route} issued {stats.count} SQL statements, budget is {stats.budget}"
+        if settings.SQL_QUERY_BUDGET_ENFORCE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class QueryStatsMiddleware:
+    """Add Server-Timing and X-DB-Queries headers with the request's SQL usage"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope["method"], scope["path"])
+        token = _request_stats.set(stats)
+
+        async def send_with_stats(message: Message):
+            if message["type"] == "http.response.start":
+                # Report the route template rather than the concrete path once routing matched
+                route = scope.get("route")
+                if route is not None:
+                    stats.path = getattr(route, "path", stats.path)
+                check_request_stats(stats)
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries"')
+                headers.append("X-DB-Queries", str(stats.count))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _request_stats.reset(token)
+
+
+if settings.SQL_INSTRUMENTATION:
+    instrument_engine(async_engine.sync_engine)
+    if read_engine is not None:
+        instrument_engine(read_engine.sync_engine)
+
+# Made with Bob
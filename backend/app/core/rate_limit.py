@@ -0,0 +1,193 @@
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from .config import settings
+from .security import decode_access_token
+
+# Shared-store writes between sweeps of buckets that have refilled completely
+PRUNE_EVERY = 1000
+
+
+def parse_rate_limit(spec: str) -> Tuple[int, float]:
+    """Burst size and window of a "requests/seconds" limit"""
+    requests, seconds = spec.split("/")
+    return int(requests), float(seconds)
+
+
+def take_token(tokens: Optional[float], updated_at: float, capacity: int, rate: float, now: float) -> Tuple[float, float]:
+    """Tokens left after taking one from a refilled bucket, and the seconds to wait when it is empty"""
+    if tokens is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryBucketStore:
+    """Token buckets of this process in least recently used order, trimmed from the oldest end"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> (tokens, updated_at, time the bucket is full again)
+        self._buckets: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+
+    def _evict(self, now: float):
+        # Drop refilled buckets, and any bucket past max_keys, until the oldest one is still in use;
+        # every bucket is removed at most once, so a hit costs O(1) amortized
+        while self._buckets:
+            _, _, full_at = next(iter(self._buckets.values()))
+            if full_at > now and len(self._buckets) <= self.max_keys:
+                break
+            self._buckets.popitem(last=False)
+
+    async def hit(self, keys: List[str], capacity: int, rate: float) -> float:
+        """Take a token from every bucket in keys, or from none if any is empty; returns the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            taken = {}
+            retry_after = 0.0
+            for key in keys:
+                tokens, updated_at, _ = self._buckets.get(key, (None, now, now))
+                taken[key], wait = take_token(tokens, updated_at, capacity, rate, now)
+                retry_after = max(retry_after, wait)
+            if retry_after == 0:
+                for key, tokens in taken.items():
+                    self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+                    self._buckets.move_to_end(key)
+                self._evict(now)
+            return retry_after
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file, so every worker on the host draws from one budget"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, full_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _hit(self, keys: List[str], capacity: int, rate: float) -> float:
+        with self._lock:
+            conn = self._connection()
+            # IMMEDIATE takes the write lock up front, so concurrent workers can't both take the last token
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                taken = {}
+                retry_after = 0.0
+                for key in keys:
+                    row = conn.execute("SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+                    taken[key], wait = take_token(row[0] if row else None, row[1] if row else now, capacity, rate, now)
+                    retry_after = max(retry_after, wait)
+                if retry_after == 0:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)",
+                        [(key, tokens, now, now + (capacity - tokens) / rate) for key, tokens in taken.items()]
+                    )
+                    self._writes += 1
+                    if self._writes % PRUNE_EVERY == 0:
+                        conn.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return retry_after
+
+    async def hit(self, keys: List[str], capacity: int, rate: float) -> float:
+        """Take a token from every bucket in keys, or from none if any is empty; returns the seconds to wait"""
+        return await asyncio.to_thread(self._hit, keys, capacity, rate)
+
+
+if settings.RATE_LIMIT_STORE:
+    bucket_store = SQLiteBucketStore(settings.RATE_LIMIT_STORE)
+else:
+    bucket_store = MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+
+
+async def request_username(request: Request) -> Optional[str]:
+    """Username field of a form or JSON body, if the request has one"""
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("application/json"):
+            data = await request.json()
+        elif content_type.startswith(("application/x-www-form-urlencoded", "multipart/form-data")):
+            data = await request.form()
+        else:
+            return None
+    except Exception:
+        return None
+    username = data.get("username") if hasattr(data, "get") else None
+    return username.lower() if isinstance(username, str) else None
+
+
+def client_ip(request: Request) -> str:
+    """Address of the client, read past RATE_LIMIT_TRUSTED_PROXIES hops of X-Forwarded-For"""
+    hops = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if hops > 0:
+        # Each trusted proxy appends the address it saw; entries left of those are client-supplied
+        forwarded = [host.strip() for value in request.headers.getlist("x-forwarded-for") for host in value.split(",")]
+        forwarded = [host for host in forwarded if host]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+def bearer_user_id(request: Request) -> Optional[str]:
+    """User id of the request's access token, if it carries a valid one"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    user_id = payload.get("user_id") if payload else None
+    return str(user_id) if user_id is not None else None
+
+
+def rate_limit(name: str, spec: str):
+    """Dependency allowing `spec` ("requests/seconds") per client IP and per username or authenticated user"""
+    capacity, seconds = parse_rate_limit(spec)
+    rate = capacity / seconds
+
+    async def check_rate_limit(request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        keys = [f"{name}:ip:{client_ip(request)}"]
+        username = await request_username(request)
+        if username:
+            keys.append(f"{name}:user:{username}")
+        user_id = bearer_user_id(request)
+        if user_id:
+            keys.append(f"{name}:user-id:{user_id}")
+        # All buckets are checked before any is drawn from, so a request refused by one spends none
+        retry_after = await bucket_store.hit(keys, capacity, rate)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+    return check_rate_limit
+
+# Made with Bob
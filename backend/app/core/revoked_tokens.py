@@ -0,0 +1,82 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from .config import settings
+from .database import async_engine
+from ..models import RevokedToken
+
+# Revocations are re-read this far behind the newest one loaded: ids and revoked_at are assigned when a
+# row is inserted, but rows become visible when they commit, which need not be in the same order
+REVOCATION_OVERLAP = timedelta(seconds=60)
+
+
+class RevokedTokenSet:
+    """Ids of revoked, unexpired refresh tokens, loaded incrementally from the revoked_tokens table"""
+
+    def __init__(self, refresh_seconds: float, compact_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.compact_seconds = compact_seconds
+        self._expires_at: Dict[str, datetime] = {}
+        self._last_revoked_at: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._compacted_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self, now: float) -> bool:
+        return self._refreshed_at is None or now - self._refreshed_at >= self.refresh_seconds
+
+    async def refresh(self):
+        """Load revocations made since the last reload; when compacting expired rows, reload them all"""
+        async with self._lock:
+            now = time.monotonic()
+            if not self._is_stale(now):
+                return
+            compact = self._compacted_at is None or now - self._compacted_at >= self.compact_seconds
+            query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+            if not compact and self._last_revoked_at is not None:
+                # Rows already loaded are read again; a dict insert is idempotent
+                query = query.where(RevokedToken.revoked_at >= self._last_revoked_at - REVOCATION_OVERLAP)
+            async with async_engine.begin() as conn:
+                if compact:
+                    await conn.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+                rows = (await conn.execute(query)).all()
+            if compact:
+                self._expires_at = {}
+                self._compacted_at = now
+            for jti, expires_at, revoked_at in rows:
+                self._expires_at[jti] = expires_at
+                if revoked_at is not None and (self._last_revoked_at is None or revoked_at > self._last_revoked_at):
+                    self._last_revoked_at = revoked_at
+            self._refreshed_at = now
+
+    async def is_revoked(self, jti: str) -> bool:
+        if self._is_stale(time.monotonic()):
+            await self.refresh()
+        return jti in self._expires_at
+
+    async def revoke(self, jti: str, expires_at: datetime):
+        """Record a revocation; other workers see it within REVOKED_TOKEN_REFRESH_SECONDS"""
+        if jti in self._expires_at:
+            return
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(insert(RevokedToken).values(jti=jti, expires_at=expires_at))
+        except IntegrityError:
+            pass  # Already revoked by another request
+        self._expires_at[jti] = expires_at
+
+    def clear(self):
+        self._expires_at = {}
+        self._last_revoked_at = None
+        self._refreshed_at = None
+        self._compacted_at = None
+
+
+revoked_tokens = RevokedTokenSet(settings.REVOKED_TOKEN_REFRESH_SECONDS, settings.REVOKED_TOKEN_COMPACT_SECONDS)
+
+# Made with Bob
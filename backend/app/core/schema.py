@@ -0,0 +1,44 @@
+from pathlib import Path
+from typing import Optional
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import exc as sa_exc
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# alembic.ini lives in the backend directory, next to the app package
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+class SchemaVersionError(RuntimeError):
+    """Raised when the database is not at the schema version this code expects"""
+
+
+def get_expected_schema_version() -> Optional[str]:
+    """Head revision of the migration chain shipped with this code"""
+    script = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+    return script.get_current_head()
+
+
+async def get_database_schema_version(engine: AsyncEngine) -> Optional[str]:
+    """Revision recorded in the database's alembic_version table"""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except sa_exc.DBAPIError:
+            return None
+        return result.scalar()
+
+
+async def check_schema_version(engine: AsyncEngine):
+    """Refuse to start unless the database schema matches the migration head"""
+    expected = get_expected_schema_version()
+    current = await get_database_schema_version(engine)
+    if current != expected:
+        raise SchemaVersionError(
+            f"Database schema is at revision {current or '<none>'} but this release expects {expected}. "
+            "Run `alembic upgrade head` from the backend directory before starting the API."
+        )
+
+# Made with Bob
@@ -1,10 +1,90 @@
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from .cache import TTLCache
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def build_password_context(schemes: List[str], rounds: Optional[int] = None, memory_cost: Optional[int] = None) -> CryptContext:
+    """Hash with the first scheme at the given cost; other schemes and costs are flagged for rehashing"""
+    options = {}
+    default_scheme = schemes[0]
+    if rounds is not None:
+        # Pinning min and max to the default makes hashes at any other cost need an update
+        for key in ("default_rounds", "min_rounds", "max_rounds"):
+            options[f"{default_scheme}__{key}"] = rounds
+    if memory_cost is not None and "argon2" in schemes:
+        options["argon2__memory_cost"] = memory_cost
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+pwd_context = build_password_context(
+    settings.password_schemes_list,
+    settings.PASSWORD_HASH_ROUNDS,
+    settings.PASSWORD_HASH_MEMORY_COST
+)
+
+
+class PasswordHashPool:
+    """Bounded executor for bcrypt work, so hashing never blocks the event loop"""
+
+    def __init__(self, kind: str, workers: int):
+        self.kind = kind
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_queued = 0
+        self.completed = 0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    async def run(self, func, *args):
+        executor = self._get_executor()
+        with self._lock:
+            self.in_flight += 1
+            self.max_queued = max(self.max_queued, self.in_flight - self.workers)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "queued": max(0, self.in_flight - self.workers),
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hash_pool = PasswordHashPool(settings.PASSWORD_HASH_EXECUTOR, settings.PASSWORD_HASH_WORKERS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -12,11 +92,31 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a new hash when the stored one uses an outdated scheme or cost"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password hashing pool"""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and compute any replacement hash on the password hashing pool"""
+    return await password_hash_pool.run(verify_and_update_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    return await password_hash_pool.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -30,12 +130,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_refresh_token(data: dict) -> str:
+    """Create a long-lived JWT refresh token with a unique id for revocation"""
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+# Verified access token payloads by token digest, so repeated bearer tokens skip signature checks
+token_decode_cache = TTLCache(settings.TOKEN_DECODE_CACHE_SIZE, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode a JWT access token"""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_decode_cache.get(key)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+    # A refresh token must never authorize a request by itself
+    if payload.get("type") == "refresh":
+        return None
+    
+    # Only valid tokens are cached, and never past their own expiry
+    expires_at = payload.get("exp")
+    token_decode_cache.set(key, payload, expires_at - time.time() if isinstance(expires_at, (int, float)) else None)
+    return payload
+
+
+def decode_refresh_token(token: str) -> Optional[dict]:
+    """Decode a JWT refresh token"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type") != "refresh" or "jti" not in payload:
+        return None
+    return payload
 
 # Made with Bob
@@ -0,0 +1,102 @@
+import logging
+import time
+from logging.handlers import RotatingFileHandler
+
+from sqlalchemy import event
+
+from .config import settings
+from .database import async_engine, engine, read_engine
+from .instrumentation import get_request_stats
+
+logger = logging.getLogger(__name__)
+
+slow_query_logger = logging.getLogger("fastdropship.slow_queries")
+
+# Longest parameter repr written per entry
+MAX_PARAMETERS_LENGTH = 2000
+
+# Only reads are re-planned; writes are never run again, even under EXPLAIN
+EXPLAINABLE_PREFIXES = ("select", "with")
+
+# The EXPLAIN runs in the request's own transaction; on PostgreSQL an error there would abort it, so
+# the EXPLAIN is wrapped in this savepoint and rolled back to it on failure
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+
+def explain_statement(dbapi_connection, dialect_name: str, statement: str, parameters) -> str:
+    """Plan of a statement, read through a separate cursor so pending results are untouched"""
+    if not statement.lstrip().lower().startswith(EXPLAINABLE_PREFIXES):
+        return "(not captured for this statement type)"
+    prefix = "EXPLAIN QUERY PLAN " if dialect_name == "sqlite" else "EXPLAIN "
+    savepoint = dialect_name == "postgresql"
+    cursor = dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+        except Exception:
+            if savepoint:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            raise
+        if savepoint:
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        return plan
+    except Exception as exc:
+        return f"(EXPLAIN failed: {exc})"
+    finally:
+        cursor.close()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_started_at = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_slow_query_started_at", None)
+    if started_at is None:
+        return
+    duration_ms = (time.perf_counter() - started_at) * 1000
+    if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+
+    stats = get_request_stats()
+    route = stats.route if stats is not None else "(no request)"
+    if executemany:
+        plan = "(not captured for executemany)"
+    else:
+        plan = explain_statement(conn.connection.dbapi_connection, conn.dialect.name, statement, parameters)
+    slow_query_logger.warning(
+        "%.1fms %s\nSQL: %s\nParameters: %s\nPlan:\n%s\n",
+        duration_ms, route, statement, repr(parameters)[:MAX_PARAMETERS_LENGTH], plan
+    )
+
+
+def log_slow_queries(sync_engine):
+    """Log statements slower than SLOW_QUERY_THRESHOLD_MS on an engine"""
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+def enable_slow_query_log():
+    """Write statements slower than SLOW_QUERY_THRESHOLD_MS to a size-rotated file"""
+    handler = RotatingFileHandler(
+        settings.SLOW_QUERY_LOG_FILE,
+        maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.setLevel(logging.WARNING)
+    slow_query_logger.propagate = False
+
+    log_slow_queries(engine)
+    log_slow_queries(async_engine.sync_engine)
+    if read_engine is not None:
+        log_slow_queries(read_engine.sync_engine)
+    logger.info("Logging SQL slower than %sms to %s", settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_LOG_FILE)
+
+# Made with Bob
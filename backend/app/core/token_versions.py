@@ -0,0 +1,59 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+
+from .config import settings
+from .database import async_engine
+from ..models import User
+
+
+class TokenVersionMap:
+    """Current token version and active flag of every user, reloaded from the users table in bulk"""
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[int, Tuple[int, bool]] = {}
+        self._refresh_started_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, since: float):
+        """Reload the map unless a reload started at or after `since` (a time.monotonic() value)"""
+        async with self._lock:
+            if self._refresh_started_at is not None and self._refresh_started_at >= since:
+                return
+            started_at = time.monotonic()
+            async with async_engine.connect() as conn:
+                result = await conn.execute(select(User.id, User.token_version, User.is_active))
+                self._versions = {user_id: (version, bool(is_active)) for user_id, version, is_active in result}
+            self._refresh_started_at = started_at
+
+    async def get(self, user_id: int) -> Optional[Tuple[int, bool]]:
+        """Token version and active flag of a user, or None for an unknown user"""
+        now = time.monotonic()
+        if self._refresh_started_at is None or now - self._refresh_started_at >= self.refresh_seconds:
+            await self.refresh(now - self.refresh_seconds)
+        entry = self._versions.get(user_id)
+        if entry is None:
+            # The user may have been created since the last reload; concurrent misses share one reload
+            await self.refresh(now)
+            entry = self._versions.get(user_id)
+        return entry
+
+    def update(self, user_id: int, version: int, is_active: bool):
+        """Apply a change committed by this process without waiting for the next refresh"""
+        known = self._versions.get(user_id)
+        # Versions only grow; a request that committed an older revocation may report after a newer one
+        if known is not None and known[0] > version:
+            return
+        self._versions[user_id] = (version, is_active)
+
+    def clear(self):
+        self._versions = {}
+        self._refresh_started_at = None
+
+
+token_versions = TokenVersionMap(settings.TOKEN_VERSION_REFRESH_SECONDS)
+
+# Made with Bob
@@ -1,15 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .core import Base, engine, settings
+from .core import async_engine, read_engine, settings
+from .core.database import get_pool_status
+from .core.security import password_hash_pool, token_decode_cache
+from .core.instrumentation import QueryStatsMiddleware
+from .core.slow_queries import enable_slow_query_log
+from .core.schema import check_schema_version
+from .core.financial_shards import financial_shard_compactor
 from .api import api_router
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    # Schema changes are applied with `alembic upgrade head`; only verify the version here
+    if settings.SCHEMA_CHECK_ON_STARTUP:
+        await check_schema_version(async_engine)
+    # Fold financial shard rows left over, and keep folding them when sharding is enabled
+    await financial_shard_compactor.start()
+    try:
+        yield
+    finally:
+        await financial_shard_compactor.stop()
+        # Close pooled connections so worker shutdown isn't held up, also when the app exits on an error
+        await async_engine.dispose()
+        if read_engine is not None:
+            await read_engine.dispose()
+        password_hash_pool.shutdown()
+
 
 app = FastAPI(
     title="Fast-Dropship API",
     description="Business Management Dashboard API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -19,8 +44,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-DB-Queries", "X-Next-Cursor", "Idempotent-Replayed"],
 )
 
+# Report SQL statement count and database time per request
+if settings.SQL_INSTRUMENTATION:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Log slow statements with their parameters, route and query plan
+if settings.SLOW_QUERY_THRESHOLD_MS is not None:
+    enable_slow_query_log()
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
@@ -42,6 +76,22 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/db")
+async def database_health():
+    """Connection pool usage and checkout wait statistics"""
+    return {"status": "healthy", "pool": get_pool_status()}
+
+
+@app.get("/health/auth")
+async def auth_health():
+    """Password hashing pool usage and queue depth, and access token decode cache hit rate"""
+    return {
+        "status": "healthy",
+        "password_hashing": password_hash_pool.status(),
+        "token_decode_cache": token_decode_cache.stats()
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
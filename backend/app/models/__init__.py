@@ -5,7 +5,10 @@ from .order import Order, OrderStatus
 from .delivery import Delivery, DeliveryStatus
 from .transaction import Transaction, TransactionType, TransactionCategory
 from .monthly_financials import MonthlyFinancials
+from .monthly_financials_shard import MonthlyFinancialsShard
 from .budget_transaction import BudgetTransaction, BudgetTransactionType, BudgetAccount
+from .revoked_token import RevokedToken
+from .idempotency_key import IdempotencyKey
 
 __all__ = [
     "Base",
@@ -20,9 +23,12 @@ __all__ = [
     "TransactionType",
     "TransactionCategory",
     "MonthlyFinancials",
+    "MonthlyFinancialsShard",
     "BudgetTransaction",
     "BudgetTransactionType",
-    "BudgetAccount"
+    "BudgetAccount",
+    "RevokedToken",
+    "IdempotencyKey"
 ]
 
 # Made with Bob
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, Enum as SQLEnum, Text
 from sqlalchemy.sql import func
 import enum
 from ..core.database import Base
@@ -16,6 +16,10 @@ class BudgetAccount(str, enum.Enum):
 
 class BudgetTransaction(Base):
     __tablename__ = "budget_transactions"
+    __table_args__ = (
+        Index("ix_budget_transactions_account_transaction_date", "account", "transaction_date"),
+        Index("ix_budget_transactions_transaction_date", "transaction_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     type = Column(SQLEnum(BudgetTransactionType), nullable=False)  # addition or withdrawal
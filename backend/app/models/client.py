@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..core.database import Base
@@ -6,6 +6,10 @@ from ..core.database import Base
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        Index("ix_clients_created_by_created_at", "created_by", "created_at"),
+        Index("ix_clients_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
@@ -13,7 +17,7 @@ class Client(Base):
     phone = Column(String, nullable=False)
     location = Column(String, nullable=False)
     notes = Column(Text, nullable=True)  # For the chat/notes feature
-    created_by = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  # User who created this client
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)  # User who created this client
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
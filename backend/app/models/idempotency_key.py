@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # A key is unique per user and route; a concurrent retry fails on this and replays the winner
+        Index("ix_idempotency_keys_user_scope_key", "user_id", "scope", "key", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    scope = Column(String, nullable=False)  # Route the key was used on
+    key = Column(String, nullable=False)  # Idempotency-Key header sent by the client
+    request_hash = Column(String(64), nullable=False)  # sha256 of the request body
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)  # JSON returned to the first request
+    expires_at = Column(DateTime, index=True, nullable=False)  # UTC; the row is compacted away after this
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Made with Bob
@@ -1,14 +1,18 @@
-from sqlalchemy import Column, Integer, Float, DateTime, String
+from sqlalchemy import Column, Integer, Float, DateTime, String, Index
 from sqlalchemy.sql import func
 from ..core.database import Base
 
 
 class MonthlyFinancials(Base):
     __tablename__ = "monthly_financials"
+    __table_args__ = (
+        # One row per month; also serves lookups by year alone
+        Index("ix_monthly_financials_year_month", "year", "month", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    year = Column(Integer, nullable=False, index=True)
-    month = Column(Integer, nullable=False, index=True)  # 1-12
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)  # 1-12
     monthly_profit = Column(Float, default=0.0, nullable=False)  # Resets each month
     monthly_revenue = Column(Float, default=0.0, nullable=False)  # Customer payments, resets each month
     overall_capital = Column(Float, default=0.0, nullable=False)  # Persists across months
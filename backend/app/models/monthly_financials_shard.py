@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
+from ..core.database import Base
+
+
+class MonthlyFinancialsShard(Base):
+    __tablename__ = "monthly_financials_shards"
+    __table_args__ = (
+        # One row per shard of a month; deltas are upserted on it
+        Index("ix_monthly_financials_shards_month_shard", "financials_id", "shard", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    financials_id = Column(Integer, ForeignKey("monthly_financials.id", ondelete="CASCADE"), nullable=False)
+    shard = Column(Integer, nullable=False)  # 0 to FINANCIALS_SHARDS - 1
+    monthly_profit = Column(Float, default=0.0, nullable=False)  # Deltas not yet folded into the month row
+    monthly_revenue = Column(Float, default=0.0, nullable=False)
+    overall_capital = Column(Float, default=0.0, nullable=False)
+
+# Made with Bob
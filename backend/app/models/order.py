@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -12,6 +12,16 @@ class OrderStatus(str, enum.Enum):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Per-user status filters and completed-order totals
+        Index("ix_orders_created_by_status_completed_at", "created_by", "status", "completed_at"),
+        Index("ix_orders_assigned_to_status", "assigned_to", "status"),
+        # Admin status filters and monthly completed-order totals
+        Index("ix_orders_status_completed_at", "status", "completed_at"),
+        # Newest-first lists and their (created_at, id) keyset cursors
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
@@ -23,8 +33,8 @@ class Order(Base):
     taxes = Column(Float, default=0.0, nullable=False)  # Taxes/fees
     profit = Column(Float, nullable=True)  # Calculated: customer_price - cost - taxes
     status = Column(SQLEnum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
-    created_by = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  # User who created this order
-    assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)  # User assigned to handle this order
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)  # User who created this order
+    assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)  # User assigned to handle this order
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -35,9 +45,14 @@ class Order(Base):
     creator = relationship("User", foreign_keys=[created_by])
     assigned_user = relationship("User", foreign_keys=[assigned_to])
     
+    @staticmethod
+    def compute_profit(customer_price: float, cost: float, taxes: float) -> float:
+        """Profit of an order's figures: customer_price - cost - taxes"""
+        return customer_price - cost - taxes
+    
     def calculate_profit(self):
         """Calculate profit: customer_price - cost - taxes"""
-        self.profit = self.customer_price - self.cost - self.taxes
+        self.profit = Order.compute_profit(self.customer_price, self.cost, self.taxes)  # type: ignore
         return self.profit
 
 # Made with Bob
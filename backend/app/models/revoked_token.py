@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True)
+    jti = Column(String, unique=True, index=True, nullable=False)  # Refresh token id
+    expires_at = Column(DateTime, index=True, nullable=False)  # UTC; the row is compacted away after this
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Reloads re-read a window behind the newest
+
+# Made with Bob
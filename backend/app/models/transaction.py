@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -20,6 +20,10 @@ class TransactionCategory(str, enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_type_transaction_date", "type", "transaction_date"),
+        Index("ix_transactions_created_by_transaction_date", "created_by", "transaction_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     type = Column(SQLEnum(TransactionType), nullable=False)
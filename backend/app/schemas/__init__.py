@@ -5,10 +5,22 @@ from .user import (
     UserChangePassword,
     Token,
     TokenData,
-    LoginRequest
+    LoginRequest,
+    RefreshRequest
 )
 from .client import ClientCreate, ClientUpdate, ClientResponse
-from .order import OrderCreate, OrderUpdate, OrderResponse, OrderWithClient
+from .order import (
+    OrderCreate,
+    OrderUpdate,
+    OrderResponse,
+    OrderWithClient,
+    OrderBulkCreate,
+    OrderBulkItemResult,
+    OrderBulkResult,
+    OrderBulkComplete,
+    OrderBulkStatusUpdate,
+    OrderBulkStatusResult
+)
 from .delivery import DeliveryCreate, DeliveryUpdate, DeliveryResponse, DeliveryWithOrder
 from .transaction import TransactionCreate, TransactionUpdate, TransactionResponse
 from .dashboard import (
@@ -42,6 +54,7 @@ __all__ = [
     "Token",
     "TokenData",
     "LoginRequest",
+    "RefreshRequest",
     "ClientCreate",
     "ClientUpdate",
     "ClientResponse",
@@ -49,6 +62,12 @@ __all__ = [
     "OrderUpdate",
     "OrderResponse",
     "OrderWithClient",
+    "OrderBulkCreate",
+    "OrderBulkItemResult",
+    "OrderBulkResult",
+    "OrderBulkComplete",
+    "OrderBulkStatusUpdate",
+    "OrderBulkStatusResult",
     "DeliveryCreate",
     "DeliveryUpdate",
     "DeliveryResponse",
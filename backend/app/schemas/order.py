@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from ..models.order import OrderStatus
 
 
@@ -50,4 +50,40 @@ class OrderWithClient(OrderResponse):
     client_location: str
     client_email: Optional[str] = None
 
+
+class OrderBulkCreate(BaseModel):
+    orders: List[OrderCreate]
+
+
+class OrderBulkItemResult(BaseModel):
+    index: int  # Position in the submitted list
+    created: bool
+    order: Optional[OrderResponse] = None
+    detail: Optional[str] = None  # Why the item was rejected
+
+
+class OrderBulkComplete(BaseModel):
+    order_ids: List[int]
+
+
+class OrderBulkStatusUpdate(OrderBulkComplete):
+    status: OrderStatus
+
+
+class OrderBulkStatusResult(BaseModel):
+    status: OrderStatus
+    requested_count: int
+    updated_count: int
+    unchanged_count: int  # Already in the status, missing, or not yours
+    updated_ids: List[int]
+    revenue_added: float  # Added to the month's revenue for newly completed orders
+    profit_added: float
+
+
+class OrderBulkResult(BaseModel):
+    created_count: int
+    rejected_count: int
+    total_cost: float  # Debited from overall capital once for all created orders
+    results: List[OrderBulkItemResult]
+
 # Made with Bob
@@ -42,6 +42,7 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
 
 
 class TokenData(BaseModel):
@@ -54,4 +55,8 @@ class LoginRequest(BaseModel):
     username: str
     password: str
 
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 # Made with Bob
@@ -0,0 +1,102 @@
+"""
+Bulk Orders Benchmark for Fast-Dropship
+Reports the time and SQL statements to create a batch of orders with single POST /api/orders/ requests
+and with one POST /api/orders/bulk, and checks both debit the same capital
+Usage: python benchmark_bulk_orders.py [BATCH ...] [--repeats N]
+The app runs in-process on a migrated scratch SQLite database
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ORDER = {"order_name": "benchmark", "quantity": 1, "cost": 10.0, "customer_price": 25.0, "taxes": 1.0}
+
+
+async def capital(client: httpx.AsyncClient, headers: dict) -> float:
+    response = await client.get("/api/financials/current", headers=headers)
+    response.raise_for_status()
+    return response.json()["overall_capital"]
+
+
+async def create_singly(client: httpx.AsyncClient, headers: dict, orders: list) -> int:
+    """Send one POST per order, one after another as a form would; returns the statements run"""
+    statements = 0
+    for order in orders:
+        response = await client.post("/api/orders/", json=order, headers=headers)
+        response.raise_for_status()
+        statements += int(response.headers.get("X-DB-Queries", 0))
+    return statements
+
+
+async def create_in_bulk(client: httpx.AsyncClient, headers: dict, orders: list) -> int:
+    response = await client.post("/api/orders/bulk", json={"orders": orders}, headers=headers)
+    response.raise_for_status()
+    if response.json()["rejected_count"]:
+        raise SystemExit("❌ the bulk request rejected some orders")
+    return int(response.headers.get("X-DB-Queries", 0))
+
+
+async def run(args):
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+            await client.post("/api/auth/register", json={"username": "benchmark", "email": "benchmark@example.com", "password": "benchmark", "role": "admin"})
+            response = await client.post("/api/auth/login", data={"username": "benchmark", "password": "benchmark"})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            response = await client.post("/api/clients/", json={"name": "Benchmark client", "phone": "0", "location": "Benchmark"}, headers=headers)
+            response.raise_for_status()
+            client_id = response.json()["id"]
+            response = await client.post("/api/budget/add", json={"type": "addition", "account": "overall_capital", "amount": 1e9}, headers=headers)
+            response.raise_for_status()
+
+            print(f"📦 median of {args.repeats} batches per size")
+            print(f"{'orders':>7} {'single ms':>10} {'statements':>11} {'bulk ms':>9} {'statements':>11} {'speedup':>8}")
+            for batch in args.batches:
+                orders = [dict(ORDER, client_id=client_id) for _ in range(batch)]
+                timings = {"single": [], "bulk": []}
+                statements = {}
+                for _ in range(args.repeats):
+                    for name, create in (("single", create_singly), ("bulk", create_in_bulk)):
+                        before = await capital(client, headers)
+                        started_at = time.perf_counter()
+                        statements[name] = await create(client, headers, orders)
+                        timings[name].append((time.perf_counter() - started_at) * 1000)
+                        debited = round(before - await capital(client, headers), 2)
+                        if debited != round(ORDER["cost"] * batch, 2):
+                            raise SystemExit(f"❌ {name} creation of {batch} orders debited {debited} instead of {ORDER['cost'] * batch}")
+                single, bulk = statistics.median(timings["single"]), statistics.median(timings["bulk"])
+                print(f"{batch:>7} {single:>10.1f} {statements['single']:>11} {bulk:>9.1f} {statements['bulk']:>11} {single / bulk:>7.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single order POSTs with one bulk POST")
+    parser.add_argument("batches", nargs="*", type=int, default=[50, 200], help="orders per batch")
+    parser.add_argument("--repeats", type=int, default=3, help="batches per size and method")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    # The app reads its settings at import, so they are set before it is loaded
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["READ_DATABASE_URL"] = ""
+    os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["SQL_INSTRUMENTATION"] = "true"
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
@@ -0,0 +1,122 @@
+"""
+Event Loop Benchmark for Fast-Dropship
+Reports /api/auth/me latency on its own and while /api/dashboard/ is requested in parallel, to show
+that slow queries don't hold up other requests on the same worker
+Usage: python benchmark_event_loop.py [--orders N] [--probes N] [--load N] [--url URL --username U --password P]
+Without --url the app runs in-process on a scratch SQLite database seeded with N orders
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+
+@asynccontextmanager
+async def in_process_client(args):
+    """Client for the app on a freshly migrated and seeded scratch database"""
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    # The app reads its settings at import, so they are set before it is loaded
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["READ_DATABASE_URL"] = ""
+    os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["FINANCIALS_SHARDS"] = "1"
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True)
+    from check_query_plans import PASSWORD, seed
+    from app.main import app
+
+    print(f"🌱 Seeding {args.orders} orders...")
+    seed(path, args.orders)
+    args.username, args.password = "admin", PASSWORD
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            yield client
+
+
+@asynccontextmanager
+async def server_client(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+        yield client
+
+
+async def probe(client: httpx.AsyncClient, headers: dict, probes: int) -> list:
+    """Latencies in milliseconds of sequential /api/auth/me requests"""
+    timings = []
+    for _ in range(probes):
+        started_at = time.perf_counter()
+        response = await client.get("/api/auth/me", headers=headers)
+        response.raise_for_status()
+        timings.append((time.perf_counter() - started_at) * 1000)
+        await asyncio.sleep(0.005)
+    return sorted(timings)
+
+
+def report(name: str, timings: list):
+    p50 = timings[len(timings) // 2]
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{name:<28} {len(timings):>7} {p50:>9.1f} {p99:>9.1f} {timings[-1]:>9.1f}")
+
+
+async def run(args):
+    client_context = server_client(args) if args.url else in_process_client(args)
+    async with client_context as client:
+        response = await client.post("/api/auth/login", data={"username": args.username, "password": args.password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        # Warm the user cache and the dashboard's statements before measuring
+        await client.get("/api/auth/me", headers=headers)
+        await client.get("/api/dashboard/", headers=headers)
+
+        print(f"📈 /api/auth/me, {args.probes} sequential probes, then again beside {args.load} parallel dashboard loaders")
+        print(f"{'condition':<28} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        report("idle", await probe(client, headers, args.probes))
+
+        stop = asyncio.Event()
+        dashboards = []
+
+        async def load():
+            while not stop.is_set():
+                started_at = time.perf_counter()
+                response = await client.get("/api/dashboard/", headers=headers)
+                response.raise_for_status()
+                dashboards.append(time.perf_counter() - started_at)
+
+        loaders = [asyncio.create_task(load()) for _ in range(args.load)]
+        started_at = time.perf_counter()
+        try:
+            timings = await probe(client, headers, args.probes)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            stop.set()
+            await asyncio.gather(*loaders)
+        report("under dashboard load", timings)
+        dashboards.sort()
+        print(f"dashboard: {len(dashboards) / elapsed:.1f} req/s, p50 {dashboards[len(dashboards) // 2] * 1000:.0f} ms while probing")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /api/auth/me latency while the dashboard is under load")
+    parser.add_argument("--orders", type=int, default=100000, help="orders to seed for the in-process app")
+    parser.add_argument("--probes", type=int, default=200, help="sequential /api/auth/me requests per condition")
+    parser.add_argument("--load", type=int, default=8, help="parallel dashboard loaders")
+    parser.add_argument("--url", help="measure a running server instead of the in-process app")
+    parser.add_argument("--username", default="admin", help="user to log in as with --url")
+    parser.add_argument("--password", help="password of that user")
+    args = parser.parse_args()
+    if args.url and not args.password:
+        parser.error("--password is required with --url")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
@@ -0,0 +1,189 @@
+"""
+Financial Concurrency Benchmark for Fast-Dropship
+Fires hundreds of parallel order creations, completions and budget moves, then checks the month's
+capital, revenue and profit to the cent and reports throughput
+Usage: python benchmark_financial_concurrency.py [--orders N] [--moves N] [--concurrency N] [--shards N]
+       python benchmark_financial_concurrency.py --url http://127.0.0.1:8000 --username admin --password ...
+Without --url the app runs in-process on a scratch SQLite database; with it, a running server (for example
+uvicorn with several workers) is measured, and its current month's totals change by the amounts below
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+ORDER_COST = 10.0
+ORDER_PRICE = 25.0
+ORDER_TAXES = 1.0
+MOVE_AMOUNT = 1.0
+# Orders the starting capital is short of, so the last creations must be refused
+SHORT_ORDERS = 20
+
+
+@asynccontextmanager
+async def in_process_client(args):
+    """Client for the app on a freshly migrated scratch database"""
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    # The app reads its settings at import, so they are set before it is loaded
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["READ_DATABASE_URL"] = ""
+    os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["FINANCIALS_SHARDS"] = str(args.shards)
+    # WAL and a busy timeout, as a deployment on SQLite would run
+    os.environ["SQLITE_PRODUCTION_PROFILE"] = "true"
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True)
+    from app.main import app
+
+    # More requests are in flight than the pool holds, so waiting for a connection is expected here
+    logging.getLogger("app.core.database").setLevel(logging.ERROR)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            await client.post("/api/auth/register", json={"username": args.username, "email": "benchmark@example.com", "password": args.password, "role": "admin"})
+            yield client
+
+
+@asynccontextmanager
+async def server_client(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+        yield client
+
+
+async def month_totals(client: httpx.AsyncClient, headers: dict) -> dict:
+    response = await client.get("/api/financials/current", headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+
+async def set_capital(client: httpx.AsyncClient, headers: dict, target: float):
+    """Move the current month's capital to exactly `target` through the budget routes"""
+    capital = (await month_totals(client, headers))["overall_capital"]
+    difference = round(target - capital, 2)
+    if difference:
+        route = "/api/budget/add" if difference > 0 else "/api/budget/withdraw"
+        kind = "addition" if difference > 0 else "withdrawal"
+        response = await client.post(route, json={"type": kind, "account": "overall_capital", "amount": abs(difference)}, headers=headers)
+        response.raise_for_status()
+
+
+async def run_phase(requests, concurrency: int) -> tuple:
+    """Send (method, path, body) requests with at most `concurrency` in flight; returns responses and seconds"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def send(send_request):
+        async with semaphore:
+            started_at = time.perf_counter()
+            response = await send_request()
+            latencies.append(time.perf_counter() - started_at)
+            return response
+
+    started_at = time.perf_counter()
+    responses = await asyncio.gather(*(send(request) for request in requests))
+    return responses, time.perf_counter() - started_at, sorted(latencies)
+
+
+def report(name: str, count: int, elapsed: float, latencies: list):
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{name:<34} {count:>6} {count / elapsed:>9.0f} {p50:>9.1f} {p99:>9.1f}")
+
+
+async def run(args):
+    client_context = server_client(args) if args.url else in_process_client(args)
+    async with client_context as client:
+        response = await client.post("/api/auth/login", data={"username": args.username, "password": args.password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post("/api/clients/", json={"name": "Benchmark client", "phone": "0", "location": "Benchmark"}, headers=headers)
+        response.raise_for_status()
+        client_id = response.json()["id"]
+
+        # Enough capital for every withdrawal and all but SHORT_ORDERS orders
+        await set_capital(client, headers, ORDER_COST * (args.orders - SHORT_ORDERS) + MOVE_AMOUNT * args.moves)
+        before = await month_totals(client, headers)
+
+        print(f"📈 {args.orders} orders and {args.moves} withdrawals, then their completions and {args.moves} profit additions; {args.concurrency} in flight")
+        print(f"{'phase':<34} {'sent':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+
+        order = {"client_id": client_id, "order_name": "benchmark", "quantity": 1, "cost": ORDER_COST, "customer_price": ORDER_PRICE, "taxes": ORDER_TAXES}
+        withdrawal = {"type": "withdrawal", "account": "overall_capital", "amount": MOVE_AMOUNT}
+        requests = (
+            [lambda: client.post("/api/orders/", json=order, headers=headers) for _ in range(args.orders)]
+            + [lambda: client.post("/api/budget/withdraw", json=withdrawal, headers=headers) for _ in range(args.moves)]
+        )
+        responses, elapsed, latencies = await run_phase(requests, args.concurrency)
+        report("create orders + withdraw capital", len(requests), elapsed, latencies)
+        orders, withdrawals = responses[:args.orders], responses[args.orders:]
+        created = [response.json() for response in orders if response.status_code == 201]
+        withdrawn = sum(1 for response in withdrawals if response.status_code == 201)
+        refused = [response for response in responses if response.status_code == 400]
+        errors = [response.status_code for response in responses if response.status_code not in (201, 400)]
+
+        # Each order is completed twice at once, by PUT and by the bulk route; only one may credit it
+        addition = {"type": "addition", "account": "monthly_profit", "amount": MOVE_AMOUNT}
+        requests = (
+            [lambda order_id=item["id"]: client.put(f"/api/orders/{order_id}", json={"status": "completed"}, headers=headers) for item in created]
+            + [lambda order_id=item["id"]: client.post("/api/orders/complete", json={"order_ids": [order_id]}, headers=headers) for item in created]
+            + [lambda: client.post("/api/budget/add", json=addition, headers=headers) for _ in range(args.moves)]
+        )
+        responses, elapsed, latencies = await run_phase(requests, args.concurrency)
+        report("complete orders twice + add profit", len(requests), elapsed, latencies)
+        added = sum(1 for response in responses[2 * len(created):] if response.status_code == 201)
+        errors += [response.status_code for response in responses if response.status_code not in (200, 201)]
+
+        after = await month_totals(client, headers)
+
+    expected = {
+        "overall_capital": before["overall_capital"] - ORDER_COST * len(created) - MOVE_AMOUNT * withdrawn,
+        "monthly_revenue": before["monthly_revenue"] + ORDER_PRICE * len(created),
+        "monthly_profit": before["monthly_profit"] + sum(item["profit"] for item in created) + MOVE_AMOUNT * added,
+    }
+    print(f"🧾 {len(created)} orders created, {withdrawn} withdrawals, {added} profit additions, {len(refused)} refused for capital, {len(errors)} errors {sorted(set(errors))}")
+    # A failed request rolled back, so it moved no money; only the totals decide the result
+    if errors:
+        print(f"   ⚠️  {len(errors)} requests failed and are left out of the expected totals")
+    exact = True
+    for name, value in expected.items():
+        matches = round(after[name], 2) == round(value, 2)
+        exact = exact and matches
+        print(f"   {name:<16} expected {value:>12.2f}   got {after[name]:>12.2f}   {'✅' if matches else '❌'}")
+    # Capital only falls during the run, so a refusal is only right if too little was left at the end
+    if refused and after["overall_capital"] >= ORDER_COST:
+        exact = False
+        print(f"   ❌ {len(refused)} requests were refused, yet {after['overall_capital']:.2f} capital is left")
+    if after["overall_capital"] < 0:
+        exact = False
+        print("   ❌ capital went negative")
+    print("✅ Totals are exact" if exact else "❌ Totals are wrong")
+    sys.exit(0 if exact else 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check month totals under parallel order and budget requests")
+    parser.add_argument("--orders", type=int, default=500, help="orders created in parallel")
+    parser.add_argument("--moves", type=int, default=200, help="capital withdrawals, and later profit additions, in parallel")
+    parser.add_argument("--concurrency", type=int, default=50, help="requests in flight at once")
+    parser.add_argument("--shards", type=int, default=1, help="FINANCIALS_SHARDS for the in-process app")
+    parser.add_argument("--url", help="measure a running server instead of the in-process app")
+    parser.add_argument("--username", default="benchmark", help="admin to log in as")
+    parser.add_argument("--password", default="benchmark", help="password of that admin")
+    args = parser.parse_args()
+    if args.orders <= SHORT_ORDERS:
+        parser.error(f"--orders must be above {SHORT_ORDERS}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
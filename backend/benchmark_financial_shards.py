@@ -0,0 +1,92 @@
+"""
+Financial Shards Benchmark for Fast-Dropship
+Reports throughput of concurrent credits to one month's totals at several shard counts
+Usage: python benchmark_financial_shards.py [SHARDS ...] [--writers N] [--writes N] [--database-url URL]
+Tables are created in a scratch database (a temporary SQLite file unless --database-url is given)
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.core.database import Base, get_async_database_url
+from app.core.financial_shards import fold_shards
+from app.api.financials import increment_month
+from app.models import MonthlyFinancials
+
+
+async def benchmark_shards(session_factory, shards: int, writers: int, writes: int) -> dict:
+    settings.FINANCIALS_SHARDS = shards
+    async with session_factory() as db:
+        financials = MonthlyFinancials(year=1900 + shards, month=1, monthly_profit=0.0, monthly_revenue=0.0, overall_capital=0.0)
+        db.add(financials)
+        await db.commit()
+
+    async def writer():
+        for _ in range(writes):
+            async with session_factory() as db:
+                await increment_month(db, financials, monthly_revenue=1.0, monthly_profit=1.0)
+                await db.commit()
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)))
+    elapsed = time.perf_counter() - started_at
+
+    async with session_factory() as db:
+        await fold_shards(db, financials.id)
+        await db.commit()
+        result = await db.execute(select(MonthlyFinancials.monthly_revenue).where(MonthlyFinancials.id == financials.id))
+        total = result.scalar_one()
+    return {
+        "shards": shards,
+        "writes_per_second": writers * writes / elapsed,
+        "exact": total == writers * writes,
+    }
+
+
+async def run(args):
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+        database_url = f"sqlite:///{path}"
+    connect_args = {"timeout": 60} if database_url.startswith("sqlite") else {}
+    engine = create_async_engine(
+        get_async_database_url(database_url),
+        connect_args=connect_args,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=args.writers,
+        max_overflow=0
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    print(f"📈 {engine.dialect.name}, {args.writers} concurrent writers, {args.writes} committed credits each")
+    print(f"{'shards':>8} {'writes/s':>10} {'exact':>6}")
+    for shards in args.shards:
+        result = await benchmark_shards(session_factory, shards, args.writers, args.writes)
+        print(f"{shards:>8} {result['writes_per_second']:>10.0f} {'yes' if result['exact'] else 'NO':>6}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure concurrent writes to monthly financials per shard count")
+    parser.add_argument("shards", nargs="*", type=int, default=[1, 8, 32], help="shard counts to measure")
+    parser.add_argument("--writers", type=int, default=32, help="concurrent writers")
+    parser.add_argument("--writes", type=int, default=50, help="credits per writer")
+    parser.add_argument("--database-url", help="scratch database; its tables are created if missing")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
@@ -0,0 +1,140 @@
+"""
+List Query Benchmark for Fast-Dropship
+Reports the per-request cost of building and running the order list query for a 100-row page:
+the cached lambda statement used by the routes, the same query as a plain select() rebuilt per call,
+and the query as it was before (whole Order entities and two select(User).subquery() joins)
+Usage: python benchmark_list_queries.py [--orders N] [--calls N] [--limit N]
+Runs against a migrated and seeded scratch SQLite database
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def plain_order_list_query(user_filter, status_filter, skip: int, limit: int):
+    """The routes' query as a plain select(), built anew on every call"""
+    from sqlalchemy import or_, select
+    from app.api.orders import AssignedUser, CreatorUser
+    from app.models import Client, Order
+
+    query = select(
+        Order.id, Order.client_id, Order.order_name, Order.order_link, Order.quantity, Order.cost,
+        Order.customer_price, Order.taxes, Order.profit, Order.status, Order.created_at, Order.updated_at,
+        Order.completed_at, Order.created_by, Order.assigned_to,
+        Client.name.label("client_name"),
+        Client.phone.label("client_phone"),
+        Client.location.label("client_location"),
+        Client.email.label("client_email"),
+        CreatorUser.username.label("created_by_username"),
+        AssignedUser.username.label("assigned_to_username")
+    ).join(Client, Order.client_id == Client.id
+    ).outerjoin(CreatorUser, Order.created_by == CreatorUser.id
+    ).outerjoin(AssignedUser, Order.assigned_to == AssignedUser.id)
+    if user_filter is not None:
+        query = query.where(or_(Order.created_by == user_filter, Order.assigned_to == user_filter))
+    if status_filter is not None:
+        query = query.where(Order.status == status_filter)
+    return query.order_by(Order.created_at.desc(), Order.id.desc()).offset(skip).limit(limit)
+
+
+def entity_order_list_query(user_filter, status_filter, skip: int, limit: int):
+    """The query before cached statements: Order entities joined to two fresh user subqueries"""
+    from sqlalchemy import or_, select
+    from app.models import Client, Order, User
+
+    creator_user = select(User).subquery()
+    assigned_user = select(User).subquery()
+    query = select(
+        Order,
+        Client.name.label("client_name"),
+        Client.phone.label("client_phone"),
+        Client.location.label("client_location"),
+        Client.email.label("client_email"),
+        creator_user.c.username.label("created_by_username"),
+        assigned_user.c.username.label("assigned_to_username")
+    ).join(Client, Order.client_id == Client.id
+    ).outerjoin(creator_user, Order.created_by == creator_user.c.id
+    ).outerjoin(assigned_user, Order.assigned_to == assigned_user.c.id)
+    if user_filter is not None:
+        query = query.where(or_(Order.created_by == user_filter, Order.assigned_to == user_filter))
+    if status_filter is not None:
+        query = query.where(Order.status == status_filter)
+    return query.offset(skip).limit(limit)
+
+
+async def benchmark_query(session_factory, build, entities: bool, calls: int) -> dict:
+    """Median microseconds to build the statement, and to build, run and turn it into response rows"""
+    from app.api.orders import build_order_dict
+
+    build_timings, request_timings = [], []
+    async with session_factory() as db:
+        for index in range(calls + 5):
+            started_at = time.perf_counter()
+            query = build()
+            built_at = time.perf_counter()
+            result = await db.execute(query)
+            if entities:
+                rows = [build_order_dict(*row) for row in result.all()]
+            else:
+                rows = [build_order_dict(row, row.client_name, row.client_phone, row.client_location, row.client_email,
+                                         row.created_by_username, row.assigned_to_username) for row in result.all()]
+            finished_at = time.perf_counter()
+            db.expunge_all()
+            # The first calls compile and cache the statement, as the first request of a worker would
+            if index >= 5:
+                build_timings.append((built_at - started_at) * 1e6)
+                request_timings.append((finished_at - started_at) * 1e6)
+    return {"build_us": statistics.median(build_timings), "request_us": statistics.median(request_timings), "rows": len(rows)}
+
+
+async def run(args):
+    from app.api.orders import OrderFilters, order_list_query
+    from app.core.database import AsyncSessionLocal, async_engine
+    from app.models import OrderStatus
+
+    print(f"⏱️  {args.calls} calls per query, {args.limit}-row pages of {args.orders} orders")
+    print(f"{'query':<22} {'role':<6} {'build us':>9} {'request us':>11} {'rows':>5}")
+    for role, user_filter, status_filter in [("admin", None, None), ("user", 2, OrderStatus.PENDING)]:
+        filters = OrderFilters(status=[status_filter] if status_filter else None, client_id=None, assigned_to=None, created_by=None,
+                               created_from=None, created_to=None, min_profit=None, max_profit=None)
+        variants = [
+            ("before (entities)", lambda: entity_order_list_query(user_filter, status_filter, 0, args.limit), True),
+            ("plain select", lambda: plain_order_list_query(user_filter, status_filter, 0, args.limit), False),
+            ("lambda_stmt (routes)", lambda: order_list_query(user_filter, filters, 0, args.limit), False),
+        ]
+        for name, build, entities in variants:
+            result = await benchmark_query(AsyncSessionLocal, build, entities, args.calls)
+            print(f"{name:<22} {role:<6} {result['build_us']:>9.0f} {result['request_us']:>11.0f} {result['rows']:>5}")
+    print("\"before\" pages were unordered, so its request time leaves out the sort the other two do")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-request Python overhead of the order list query variants")
+    parser.add_argument("--orders", type=int, default=20000, help="orders to seed")
+    parser.add_argument("--calls", type=int, default=500, help="measured calls per query and role")
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    # The app reads its settings at import, so they are set before it is loaded
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["READ_DATABASE_URL"] = ""
+    os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+    os.environ["SQL_INSTRUMENTATION"] = "false"
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True)
+    from check_query_plans import seed
+    seed(path, args.orders)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
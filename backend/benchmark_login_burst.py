@@ -0,0 +1,107 @@
+"""
+Login Burst Benchmark for Fast-Dropship
+Reports latency of an unrelated route (GET /api/clients/) on its own and during a burst of concurrent
+logins, to show that password hashing doesn't stall the worker
+Usage: python benchmark_login_burst.py [--logins N] [--concurrency N] [--executor thread|process] [--workers N] [--rounds N]
+The app runs in-process on a migrated scratch SQLite database with rate limits off; unset options keep
+the configured PASSWORD_HASH_* settings
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+PASSWORD = "benchmark-password"
+
+
+async def probe_until(client: httpx.AsyncClient, headers: dict, done) -> list:
+    """Latencies in milliseconds of sequential GET /api/clients/ until done() is true"""
+    timings = []
+    while not done():
+        started_at = time.perf_counter()
+        response = await client.get("/api/clients/", headers=headers)
+        response.raise_for_status()
+        timings.append((time.perf_counter() - started_at) * 1000)
+        await asyncio.sleep(0.01)
+    return sorted(timings)
+
+
+def report(name: str, timings: list):
+    p50 = timings[len(timings) // 2]
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{name:<22} {len(timings):>7} {p50:>9.1f} {p99:>9.1f} {timings[-1]:>9.1f}")
+
+
+async def run(args):
+    from app.main import app
+    from app.core.security import password_hash_pool
+
+    # Logins and probes may briefly outnumber the pool, so waiting for a connection is expected here
+    logging.getLogger("app.core.database").setLevel(logging.ERROR)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+            response = await client.post("/api/auth/register", json={"username": "benchmark", "email": "benchmark@example.com", "password": PASSWORD})
+            response.raise_for_status()
+            response = await client.post("/api/auth/login", data={"username": "benchmark", "password": PASSWORD})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            pool = password_hash_pool.status()
+            print(f"🔐 {args.logins} logins, {args.concurrency} at once, hashed on {pool['workers']} {pool['executor']} workers; "
+                  f"probing GET /api/clients/")
+            print(f"{'condition':<22} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+            started_at = time.perf_counter()
+            report("idle", await probe_until(client, headers, lambda: time.perf_counter() - started_at > 2))
+
+            semaphore = asyncio.Semaphore(args.concurrency)
+            statuses = []
+
+            async def login():
+                async with semaphore:
+                    response = await client.post("/api/auth/login", data={"username": "benchmark", "password": PASSWORD})
+                    statuses.append(response.status_code)
+
+            started_at = time.perf_counter()
+            logins = asyncio.gather(*(login() for _ in range(args.logins)))
+            timings = await probe_until(client, headers, logins.done)
+            await logins
+            elapsed = time.perf_counter() - started_at
+            report("during login burst", timings)
+            pool = password_hash_pool.status()
+            failed = sum(1 for status_code in statuses if status_code != 200)
+            print(f"logins: {args.logins / elapsed:.1f}/s, {failed} failed, peak hashing queue {pool['max_queued']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure unrelated route latency during a burst of logins")
+    parser.add_argument("--logins", type=int, default=64, help="logins in the burst")
+    parser.add_argument("--concurrency", type=int, default=32, help="logins in flight at once")
+    parser.add_argument("--executor", choices=["thread", "process"], help="PASSWORD_HASH_EXECUTOR")
+    parser.add_argument("--workers", type=int, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--rounds", type=int, help="PASSWORD_HASH_ROUNDS")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    # The app reads its settings at import, so they are set before it is loaded
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["READ_DATABASE_URL"] = ""
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    for name, value in [("PASSWORD_HASH_EXECUTOR", args.executor), ("PASSWORD_HASH_WORKERS", args.workers), ("PASSWORD_HASH_ROUNDS", args.rounds)]:
+        if value is not None:
+            os.environ[name] = str(value)
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
@@ -0,0 +1,118 @@
+"""
+Order Export Benchmark for Fast-Dropship
+Streams GET /api/orders/export from a uvicorn server on a database of N synthetic orders, samples the
+server's resident memory meanwhile, and fails if it grows by more than the allowed ceiling
+Usage: python benchmark_order_export.py [--orders N] [--format csv|ndjson] [--max-growth-mb N]
+The server runs on a migrated and seeded scratch SQLite database; memory is read from /proc (Linux)
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"no VmRSS for process {pid}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env: dict, port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise SystemExit("❌ the server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that streaming the order export keeps server memory flat")
+    parser.add_argument("--orders", type=int, default=1000000, help="orders to seed")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv", help="export format")
+    parser.add_argument("--max-growth-mb", type=float, default=64, help="allowed growth of the server's RSS")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", READ_DATABASE_URL="", PASSWORD_HASH_ROUNDS="4", RATE_LIMIT_ENABLED="false")
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True, env=env)
+    os.environ["DATABASE_URL"] = env["DATABASE_URL"]
+    from check_query_plans import PASSWORD, seed
+    print(f"🌱 Seeding {args.orders} orders...")
+    seed(path, args.orders)
+
+    port = free_port()
+    server = start_server(env, port)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        response = httpx.post(f"{base_url}/api/auth/login", data={"username": "admin", "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        start_mb = rss_mb(server.pid)
+        samples = [start_mb]
+        streaming = threading.Event()
+        streaming.set()
+
+        def sample():
+            while streaming.is_set():
+                samples.append(rss_mb(server.pid))
+                time.sleep(0.05)
+
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+        lines = 0
+        size = 0
+        started_at = time.perf_counter()
+        try:
+            with httpx.stream("GET", f"{base_url}/api/orders/export", params={"format": args.format}, headers=headers, timeout=None) as export:
+                export.raise_for_status()
+                for chunk in export.iter_bytes():
+                    lines += chunk.count(b"\n")
+                    size += len(chunk)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            streaming.clear()
+            sampler.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    expected = args.orders + (1 if args.format == "csv" else 0)
+    growth = max(samples) - start_mb
+    print(f"📤 {args.format}: {lines} lines, {size / 2 ** 20:.0f} MB in {elapsed:.1f}s ({args.orders / elapsed:.0f} orders/s)")
+    print(f"   server RSS {start_mb:.0f} MB at start, {max(samples):.0f} MB peak, +{growth:.0f} MB (ceiling +{args.max_growth_mb:.0f} MB)")
+    ok = lines == expected and growth <= args.max_growth_mb
+    if lines != expected:
+        print(f"   ❌ expected {expected} lines")
+    print("✅ Memory stayed flat" if ok else "❌ Export check failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
@@ -0,0 +1,103 @@
+"""
+Order Pages Benchmark for Fast-Dropship
+Reports latency of page 1 and of a deep page of the order lists, reached by X-Next-Cursor and by skip
+Usage: python benchmark_order_pages.py [--orders N] [--page N] [--limit N] [--repeats N]
+The app runs in-process on a migrated scratch SQLite database seeded with N synthetic orders; the cursor
+walk to the deep page also checks that no order is returned twice
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+# (role, route) of the lists measured
+ROUTES = [
+    ("admin", "/api/orders/"),
+    ("admin", "/api/orders/pending"),
+    ("user", "/api/orders/"),
+]
+
+
+async def timed_get(client: httpx.AsyncClient, url: str, headers: dict, params: dict) -> tuple:
+    started_at = time.perf_counter()
+    response = await client.get(url, headers=headers, params=params)
+    response.raise_for_status()
+    return (time.perf_counter() - started_at) * 1000, response
+
+
+async def median_ms(client: httpx.AsyncClient, url: str, headers: dict, params: dict, repeats: int) -> float:
+    return statistics.median([(await timed_get(client, url, headers, params))[0] for _ in range(repeats)])
+
+
+async def benchmark_route(client: httpx.AsyncClient, url: str, headers: dict, args) -> dict:
+    """Page 1, the deep page by cursor (walking every page before it) and the deep page by skip"""
+    seen = set()
+    cursor = None
+    for page in range(1, args.page):
+        _, response = await timed_get(client, url, headers, {"limit": args.limit, **({"cursor": cursor} if cursor else {})})
+        seen.update(order["id"] for order in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            raise SystemExit(f"❌ {url} ran out of rows at page {page}; seed more orders or lower --page")
+    _, response = await timed_get(client, url, headers, {"limit": args.limit, "cursor": cursor})
+    deep_ids = [order["id"] for order in response.json()]
+    if seen.intersection(deep_ids) or len(seen) != (args.page - 1) * args.limit:
+        raise SystemExit(f"❌ {url} returned an order twice while walking its pages")
+    return {
+        "first": await median_ms(client, url, headers, {"limit": args.limit}, args.repeats),
+        "cursor": await median_ms(client, url, headers, {"limit": args.limit, "cursor": cursor}, args.repeats),
+        "skip": await median_ms(client, url, headers, {"limit": args.limit, "skip": (args.page - 1) * args.limit}, args.repeats),
+    }
+
+
+async def run(args, path: str):
+    from check_query_plans import PASSWORD, seed
+    from app.main import app
+
+    print(f"🌱 Seeding {args.orders} orders...")
+    seed(path, args.orders)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+            headers = {}
+            for role in ("admin", "user"):
+                response = await client.post("/api/auth/login", data={"username": role, "password": PASSWORD})
+                response.raise_for_status()
+                headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            print(f"📄 {args.limit}-row pages, median of {args.repeats} requests")
+            print(f"{'list':<28} {'page 1 ms':>10} {f'page {args.page} cursor':>17} {f'page {args.page} skip':>15}")
+            for role, url in ROUTES:
+                result = await benchmark_route(client, url, headers[role], args)
+                print(f"{f'{role} {url}':<28} {result['first']:>10.1f} {result['cursor']:>17.1f} {result['skip']:>15.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare deep order list pages by cursor and by skip")
+    parser.add_argument("--orders", type=int, default=1000000, help="orders to seed")
+    parser.add_argument("--page", type=int, default=1000, help="deep page to measure")
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--repeats", type=int, default=5, help="requests per measurement")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    # The app reads its settings at import, so they are set before it is loaded
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["READ_DATABASE_URL"] = ""
+    os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True)
+    asyncio.run(run(args, path))
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
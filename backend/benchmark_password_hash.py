@@ -0,0 +1,59 @@
+"""
+Password Hash Benchmark for Fast-Dropship
+Reports verification latency of the configured password hash scheme at several costs
+Usage: python benchmark_password_hash.py [ROUNDS ...] [--verifies N]
+Without ROUNDS, PASSWORD_HASH_ROUNDS and its neighbours are measured
+"""
+
+import argparse
+import statistics
+import time
+
+from app.core.config import settings
+from app.core.security import build_password_context
+
+
+def benchmark_rounds(scheme: str, rounds: int, verifies: int) -> dict:
+    context = build_password_context([scheme], rounds, settings.PASSWORD_HASH_MEMORY_COST)
+    hashed = context.hash("benchmark-password")
+    timings = []
+    for _ in range(verifies):
+        started_at = time.perf_counter()
+        context.verify("benchmark-password", hashed)
+        timings.append((time.perf_counter() - started_at) * 1000)
+    median_ms = statistics.median(timings)
+    return {
+        "rounds": rounds,
+        "median_ms": median_ms,
+        "max_ms": max(timings),
+        "per_worker_per_second": 1000 / median_ms,
+    }
+
+
+def main():
+    scheme = settings.password_schemes_list[0]
+    parser = argparse.ArgumentParser(description=f"Measure {scheme} verification latency per cost")
+    parser.add_argument("rounds", nargs="*", type=int, help="costs to measure")
+    parser.add_argument("--verifies", type=int, default=10, help="verifications per cost")
+    args = parser.parse_args()
+
+    rounds_list = args.rounds
+    if not rounds_list:
+        configured = settings.PASSWORD_HASH_ROUNDS
+        if configured is None:
+            configured = build_password_context([scheme]).handler(scheme).default_rounds
+        rounds_list = [configured - 2, configured - 1, configured, configured + 1]
+
+    print(f"🔐 {scheme}, {args.verifies} verifications per cost, {settings.PASSWORD_HASH_WORKERS} hashing workers")
+    print(f"{'rounds':>8} {'median ms':>10} {'max ms':>10} {'logins/s':>10}")
+    for rounds in rounds_list:
+        result = benchmark_rounds(scheme, rounds, args.verifies)
+        logins_per_second = result["per_worker_per_second"] * settings.PASSWORD_HASH_WORKERS
+        print(f"{rounds:>8} {result['median_ms']:>10.1f} {result['max_ms']:>10.1f} {logins_per_second:>10.0f}")
+    print("logins/s assumes every hashing worker has a CPU core to itself")
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
@@ -0,0 +1,111 @@
+"""
+SQLite Profile Benchmark for Fast-Dropship
+Reports order creation and dashboard read throughput, run concurrently, with SQLITE_PRODUCTION_PROFILE off and on
+Usage: python benchmark_sqlite_profile.py [--orders N] [--writers N] [--readers N] [--seconds N]
+Each profile runs the app in-process, in its own interpreter, on a freshly seeded scratch SQLite database
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+async def measure(args) -> dict:
+    """Writers creating orders and readers loading the dashboard for args.seconds"""
+    from check_query_plans import PASSWORD, seed
+    from app.main import app
+
+    seed(os.environ["DATABASE_URL"][len("sqlite:///"):], args.orders)
+    # More requests may be in flight than the pool holds, so waiting for a connection is expected here
+    logging.getLogger("app.core.database").setLevel(logging.ERROR)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            response = await client.post("/api/auth/login", data={"username": "admin", "password": PASSWORD})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            response = await client.post("/api/budget/add", json={"type": "addition", "account": "overall_capital", "amount": 1e9}, headers=headers)
+            response.raise_for_status()
+
+            order = {"client_id": 1, "order_name": "benchmark", "quantity": 1, "cost": 10.0, "customer_price": 25.0, "taxes": 1.0}
+            results = {"write": [], "read": []}
+            errors = []
+            deadline = time.perf_counter() + args.seconds
+
+            async def loop(kind: str, send):
+                while time.perf_counter() < deadline:
+                    started_at = time.perf_counter()
+                    response = await send()
+                    if response.status_code >= 400:
+                        errors.append(response.status_code)
+                    else:
+                        results[kind].append(time.perf_counter() - started_at)
+
+            await asyncio.gather(
+                *(loop("write", lambda: client.post("/api/orders/", json=order, headers=headers)) for _ in range(args.writers)),
+                *(loop("read", lambda: client.get("/api/dashboard/", headers=headers)) for _ in range(args.readers))
+            )
+
+    summary = {"errors": len(errors)}
+    for kind, timings in results.items():
+        timings.sort()
+        summary[kind] = {
+            "per_second": len(timings) / args.seconds,
+            "p50_ms": timings[len(timings) // 2] * 1000 if timings else 0.0,
+            "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000 if timings else 0.0,
+        }
+    return summary
+
+
+def run_profile(args, profile: bool) -> dict:
+    """Measure one profile in a child interpreter, since the app reads its settings at import"""
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{path}",
+        READ_DATABASE_URL="",
+        PASSWORD_HASH_ROUNDS="4",
+        RATE_LIMIT_ENABLED="false",
+        FINANCIALS_SHARDS="1",
+        SQLITE_PRODUCTION_PROFILE="true" if profile else "false",
+    )
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True, env=env)
+    command = [sys.executable, __file__, "--measure", "--orders", str(args.orders), "--writers", str(args.writers),
+               "--readers", str(args.readers), "--seconds", str(args.seconds)]
+    result = subprocess.run(command, check=True, capture_output=True, text=True, env=env)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare concurrent writes and reads with the SQLite production profile off and on")
+    parser.add_argument("--orders", type=int, default=50000, help="orders to seed before measuring")
+    parser.add_argument("--writers", type=int, default=8, help="parallel order creators")
+    parser.add_argument("--readers", type=int, default=8, help="parallel dashboard readers")
+    parser.add_argument("--seconds", type=float, default=20, help="seconds to measure each profile")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        print(json.dumps(asyncio.run(measure(args))))
+        return
+
+    print(f"📈 {args.writers} order creators and {args.readers} dashboard readers for {args.seconds:.0f}s on {args.orders} seeded orders")
+    print(f"{'profile':>8} {'orders/s':>9} {'p99 ms':>8} {'reads/s':>8} {'p99 ms':>8} {'errors':>7}")
+    for profile in (False, True):
+        result = run_profile(args, profile)
+        write, read = result["write"], result["read"]
+        print(f"{'on' if profile else 'off':>8} {write['per_second']:>9.1f} {write['p99_ms']:>8.0f} "
+              f"{read['per_second']:>8.1f} {read['p99_ms']:>8.0f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
@@ -0,0 +1,97 @@
+"""
+Startup Benchmark for Fast-Dropship
+Reports how long a fresh worker takes to import app.main and run its startup (schema version check),
+next to the Base.metadata.create_all that used to run at import, and how long a burst of requests
+sent right after startup waits for pooled connections
+Usage: python benchmark_startup.py [--runs N] [--burst N]
+Each run is a fresh interpreter on a migrated scratch SQLite database, as a new worker would be
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+async def measure(burst: int) -> dict:
+    """Import, startup and burst timings of this interpreter"""
+    started_at = time.perf_counter()
+    from app.main import app
+    import_seconds = time.perf_counter() - started_at
+
+    import httpx
+    from app.core.database import Base, engine, pool_stats
+
+    started_at = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    create_all_seconds = time.perf_counter() - started_at
+
+    # The burst is meant to exhaust the pool, so its warnings are expected here
+    logging.getLogger("app.core.database").setLevel(logging.ERROR)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        started_at = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            startup_seconds = time.perf_counter() - started_at
+            response = await client.post("/api/auth/register", json={"username": "benchmark", "email": "benchmark@example.com", "password": "benchmark"})
+            response.raise_for_status()
+            response = await client.post("/api/auth/login", data={"username": "benchmark", "password": "benchmark"})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            pool_stats.reset()
+            started_at = time.perf_counter()
+            responses = await asyncio.gather(*(client.get("/api/clients/", headers=headers) for _ in range(burst)))
+            burst_seconds = time.perf_counter() - started_at
+            pool = (await client.get("/health/db")).json()["pool"]
+    return {
+        "import": import_seconds,
+        "create_all": create_all_seconds,
+        "startup": startup_seconds,
+        "burst": burst_seconds,
+        "failed": sum(1 for response in responses if response.status_code != 200),
+        "pool": pool,
+    }
+
+
+def run_once(burst: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", READ_DATABASE_URL="", PASSWORD_HASH_ROUNDS="4", RATE_LIMIT_ENABLED="false")
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True, env=env)
+    result = subprocess.run([sys.executable, __file__, "--measure", "--burst", str(burst)], check=True, capture_output=True, text=True, env=env)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure worker import and startup time and pool waits of a request burst after startup")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--burst", type=int, default=100, help="parallel requests sent right after startup")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        print(json.dumps(asyncio.run(measure(args.burst))))
+        return
+
+    results = [run_once(args.burst) for _ in range(args.runs)]
+    pool = results[-1]["pool"]
+    print(f"🚀 {args.runs} fresh workers, {args.burst} parallel GET /api/clients/ right after startup")
+    print(f"{'step':<32} {'median ms':>10} {'max ms':>10}")
+    for name, key in [("import app.main", "import"), ("startup (schema check)", "startup"),
+                      ("create_all (before migrations)", "create_all"), ("burst", "burst")]:
+        timings = [result[key] * 1000 for result in results]
+        print(f"{name:<32} {statistics.median(timings):>10.1f} {max(timings):>10.1f}")
+    print(f"pool {pool.get('size')}+{pool.get('max_overflow')}: {pool['exhausted']} of {pool['checkouts']} checkouts waited, "
+          f"avg {pool['wait_avg_ms']:.1f} ms, max {pool['wait_max_ms']:.1f} ms, {pool['timeouts']} timed out, "
+          f"{sum(result['failed'] for result in results)} failed requests over all runs")
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
@@ -0,0 +1,226 @@
+"""
+Query Plan Check for Fast-Dropship
+Runs the list and report routes against a seeded SQLite database and fails if any of their
+SELECTs reads a whole table (a "SCAN <table>" step without an index in EXPLAIN QUERY PLAN)
+Usage: python check_query_plans.py [--orders N] [--database PATH] [--verbose]
+The database is migrated to head and seeded; a temporary file is used unless --database is given
+"""
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Tables that grow with the business; users and shard rows stay small, so scanning them is fine
+CHECKED_TABLES = {"orders", "clients", "deliveries", "transactions", "budget_transactions", "monthly_financials"}
+
+# A plan step reading every row of a table: "SCAN orders", but not "SCAN orders USING INDEX ..."
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+# Requests whose query reads a whole table by definition, with the reason
+ALLOWED_FULL_SCANS = {
+    "/api/budget/summary (admin)": "all-time totals over every budget transaction",
+}
+
+PASSWORD = "plans"
+
+# (role, path) of every list and report route, with the filters the frontend sends
+ROUTES = [
+    ("admin", "/api/orders/"),
+    ("admin", "/api/orders/?status=pending"),
+    ("admin", "/api/orders/?status=pending&status=completed"),
+    ("admin", "/api/orders/?created_by=2&status=completed"),
+    ("admin", "/api/orders/?assigned_to=3&status=pending"),
+    ("admin", "/api/orders/?client_id=7"),
+    ("admin", "/api/orders/pending"),
+    ("admin", "/api/orders/completed"),
+    ("admin", "/api/orders/recent/list"),
+    ("user", "/api/orders/"),
+    ("user", "/api/orders/pending"),
+    ("user", "/api/orders/completed"),
+    ("user", "/api/orders/recent/list"),
+    ("admin", "/api/clients/"),
+    ("admin", "/api/clients/recent/list"),
+    ("user", "/api/clients/"),
+    ("user", "/api/clients/recent/list"),
+    ("admin", "/api/deliveries/"),
+    ("admin", "/api/deliveries/?status_filter=in_transit"),
+    ("user", "/api/deliveries/"),
+    ("user", "/api/deliveries/?status_filter=pending"),
+    ("admin", "/api/transactions/"),
+    ("admin", "/api/transactions/?type_filter=income"),
+    ("admin", "/api/transactions/summary"),
+    ("admin", "/api/transactions/monthly"),
+    ("user", "/api/transactions/"),
+    ("user", "/api/transactions/?type_filter=expense"),
+    ("user", "/api/transactions/summary"),
+    ("user", "/api/transactions/monthly"),
+    ("admin", "/api/budget/balances"),
+    ("admin", "/api/budget/transactions"),
+    ("admin", "/api/budget/transactions?account=overall_capital"),
+    ("admin", "/api/budget/summary"),
+    ("admin", "/api/budget/summary?account=monthly_profit"),
+    ("admin", "/api/budget/summary?start_date=2025-01-01&end_date=2025-03-31"),
+    ("admin", "/api/dashboard/"),
+    ("admin", "/api/dashboard/stats"),
+    ("user", "/api/dashboard/"),
+    ("user", "/api/dashboard/stats"),
+    ("admin", "/api/financials/current"),
+    ("admin", "/api/financials/summary"),
+    ("admin", "/api/financials/history"),
+]
+
+
+def seed(path: str, orders: int):
+    """Users, clients, orders and their related rows spread over the last three years"""
+    from app.core.security import get_password_hash
+
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    stamp = lambda days: (now - timedelta(days=days, seconds=rng.randrange(86400))).strftime("%Y-%m-%d %H:%M:%S.%f")
+    hashed = get_password_hash(PASSWORD)
+    clients = max(orders // 40, 10)
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO users (id, username, email, hashed_password, role, is_active, token_version) VALUES (?, ?, ?, ?, ?, 1, 0)",
+        [(1, "admin", "admin@example.com", hashed, "ADMIN"), (2, "user", "user@example.com", hashed, "USER"), (3, "other", "other@example.com", hashed, "USER")]
+    )
+    conn.executemany(
+        "INSERT INTO clients (id, name, phone, location, created_by, created_at) VALUES (?, ?, '0', 'Cairo', ?, ?)",
+        [(i, f"client {i}", 2 + i % 2, stamp(rng.randrange(1095))) for i in range(1, clients + 1)]
+    )
+
+    def order_rows():
+        for i in range(1, orders + 1):
+            age = rng.randrange(1095)
+            completed = rng.random() < 0.7
+            yield (
+                i, rng.randrange(1, clients + 1), f"order {i}", 1, 10.0, 25.0, 1.0, 14.0,
+                "COMPLETED" if completed else "PENDING", 1 + i % 3, rng.choice([None, 2, 3]),
+                stamp(age), stamp(max(age - 3, 0)) if completed else None
+            )
+    conn.executemany(
+        "INSERT INTO orders (id, client_id, order_name, quantity, cost, customer_price, taxes, profit, status, created_by, assigned_to, created_at, completed_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        order_rows()
+    )
+    conn.executemany(
+        "INSERT INTO deliveries (order_id, delivery_address, status, created_by, created_at) VALUES (?, 'Cairo', ?, ?, ?)",
+        [(i, rng.choice(["PENDING", "IN_TRANSIT", "DELIVERED", "FAILED"]), 1 + i % 3, stamp(rng.randrange(1095))) for i in range(1, orders + 1, 4)]
+    )
+    conn.executemany(
+        "INSERT INTO transactions (type, category, amount, created_by, transaction_date) VALUES (?, 'OTHER', 5.0, ?, ?)",
+        [(rng.choice(["INCOME", "EXPENSE"]), 1 + i % 3, stamp(rng.randrange(1095))) for i in range(orders // 2)]
+    )
+    conn.executemany(
+        "INSERT INTO budget_transactions (type, account, amount, created_by, transaction_date) VALUES (?, ?, 5.0, 'admin@example.com', ?)",
+        [(rng.choice(["ADDITION", "WITHDRAWAL"]), rng.choice(["MONTHLY_PROFIT", "OVERALL_CAPITAL"]), stamp(rng.randrange(1095))) for _ in range(orders // 4)]
+    )
+    months = sorted({((now - timedelta(days=31 * n)).year, (now - timedelta(days=31 * n)).month) for n in range(1, 36)})
+    conn.executemany(
+        "INSERT INTO monthly_financials (year, month, monthly_profit, monthly_revenue, overall_capital) VALUES (?, ?, 100.0, 250.0, 1000.0)",
+        months
+    )
+    conn.commit()
+    # Statistics as PRAGMA optimize keeps them in production, so the planner sees realistic row counts
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def reads_first_rows(statement: str) -> bool:
+    """Whether a statement is an unfiltered, unordered page, which stops scanning after LIMIT rows"""
+    words = f" {' '.join(statement.upper().split())} "
+    return " LIMIT " in words and not any(clause in words for clause in (" WHERE ", " ORDER BY ", " GROUP BY "))
+
+
+def full_scans(conn: sqlite3.Connection, statement: str, parameters) -> list:
+    """Checked tables a statement reads in full"""
+    if reads_first_rows(statement):
+        return []
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    scans = []
+    for _, _, _, detail in plan:
+        match = FULL_SCAN.match(detail)
+        if match and match.group(1) in CHECKED_TABLES:
+            scans.append(detail)
+    return scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when a list or report query reads a whole table")
+    parser.add_argument("--orders", type=int, default=20000, help="orders to seed; other tables are sized from it")
+    parser.add_argument("--database", help="SQLite file to create (must not exist)")
+    parser.add_argument("--verbose", action="store_true", help="print every checked statement")
+    args = parser.parse_args()
+
+    path = args.database or os.path.join(tempfile.mkdtemp(), "plans.db")
+    if os.path.exists(path):
+        parser.error(f"{path} already exists")
+    # The app reads its settings at import, so they are set before it is loaded
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["READ_DATABASE_URL"] = ""
+    os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["FINANCIALS_SHARDS"] = "1"
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.core.database import async_engine
+    from app.main import app
+
+    print(f"🌱 Seeding {args.orders} orders into {path}...")
+    seed(path, args.orders)
+
+    statements = {}
+    # Route being requested; statements of startup and login are not checked
+    current = {"route": None}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if current["route"] and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.setdefault(statement, (tuple(parameters), current["route"]))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    with TestClient(app) as client:
+        headers = {}
+        for role in ("admin", "user"):
+            response = client.post("/api/auth/login", data={"username": role, "password": PASSWORD})
+            response.raise_for_status()
+            headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for role, route in ROUTES:
+            current["route"] = f"{route} ({role})"
+            response = client.get(route, headers=headers[role])
+            if response.status_code != 200:
+                print(f"❌ {route} as {role} answered {response.status_code}: {response.text[:200]}")
+                sys.exit(1)
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+    conn = sqlite3.connect(path)
+    failures = allowed = 0
+    for statement, (parameters, route) in statements.items():
+        scans = full_scans(conn, statement, parameters)
+        if scans and route in ALLOWED_FULL_SCANS:
+            allowed += 1
+            print(f"⚠️  {route}: {', '.join(scans)} (allowed: {ALLOWED_FULL_SCANS[route]})")
+        elif scans:
+            failures += 1
+            print(f"❌ {route}: {', '.join(scans)}")
+            print(f"   {' '.join(statement.split())[:300]}")
+        elif args.verbose:
+            print(f"✅ {route}: {' '.join(statement.split())[:120]}")
+    conn.close()
+
+    print(f"📋 {len(statements)} statements from {len(ROUTES)} requests, {failures} with a full table scan ({allowed} allowed)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
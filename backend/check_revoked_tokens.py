@@ -0,0 +1,85 @@
+"""
+Revoked Token Check for Fast-Dropship
+Commits two refresh token revocations out of id order, as concurrent logouts in other workers can on
+PostgreSQL, and fails unless POST /api/auth/refresh rejects both tokens in this worker
+Usage: python check_revoked_tokens.py
+Runs the app in-process on a migrated scratch SQLite database; the revocations are written directly
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+PASSWORD = "revocations"
+
+
+def commit_revocation(path: str, row_id: int, jti: str, revoked_at: datetime):
+    """Commit a revocation with the id and revoked_at its transaction was assigned when it inserted"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO revoked_tokens (id, jti, expires_at, revoked_at) VALUES (?, ?, ?, ?)",
+        (row_id, jti, (datetime.utcnow() + timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S.%f"), revoked_at.strftime("%Y-%m-%d %H:%M:%S"))
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "revocations.db")
+    # The app reads its settings at import, so they are set before it is loaded
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["READ_DATABASE_URL"] = ""
+    os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    # Reload on every check, and compact (reloading everything) only on the first
+    os.environ["REVOKED_TOKEN_REFRESH_SECONDS"] = "0"
+    os.environ["REVOKED_TOKEN_COMPACT_SECONDS"] = "3600"
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True)
+
+    from fastapi.testclient import TestClient
+    from app.core.security import decode_refresh_token
+    from app.main import app
+
+    with TestClient(app) as client:
+        client.post("/api/auth/register", json={"username": "revoker", "email": "revoker@example.com", "password": PASSWORD}).raise_for_status()
+        tokens = []
+        for _ in range(3):
+            response = client.post("/api/auth/login", data={"username": "revoker", "password": PASSWORD})
+            response.raise_for_status()
+            tokens.append(response.json()["refresh_token"])
+        earlier, later, kept = tokens
+
+        def refresh_status(token: str) -> int:
+            return client.post("/api/auth/refresh", json={"refresh_token": token}).status_code
+
+        # Load the (empty) set, so the rest goes through incremental reloads
+        failures = []
+        if refresh_status(kept) != 200:
+            failures.append("an unrevoked token was rejected before any revocation")
+
+        # Two logouts insert ids 1 and 2; id 2 commits first and is loaded before id 1 becomes visible
+        inserted_at = datetime.utcnow().replace(microsecond=0)
+        commit_revocation(path, 2, decode_refresh_token(later)["jti"], inserted_at + timedelta(seconds=1))
+        if refresh_status(later) != 401:
+            failures.append("the token revoked by id 2 was accepted")
+        commit_revocation(path, 1, decode_refresh_token(earlier)["jti"], inserted_at)
+        if refresh_status(earlier) != 401:
+            failures.append("the token revoked by id 1, committed after id 2 was loaded, was accepted")
+        if refresh_status(later) != 401:
+            failures.append("the token revoked by id 2 was accepted after id 1 was loaded")
+        if refresh_status(kept) != 200:
+            failures.append("an unrevoked token was rejected")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    print("✅ Both out-of-order revocations were rejected" if not failures else "❌ Revocation check failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
+
+# Made with Bob
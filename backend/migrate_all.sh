@@ -11,30 +11,19 @@ if [ ! -f "fastdropship.db" ]; then
     echo "Please run the application first to create the database."
     echo ""
     echo "You can create a fresh database by running:"
-    echo "  python3 seed_data.py"
+    echo "  alembic upgrade head && python3 seed_data.py"
     exit 1
 fi
 
 echo "📊 Found database: fastdropship.db"
 echo ""
 
-# Run multiuser migration
-echo "Step 1: Running multiuser RBAC migration..."
+echo "Applying pending Alembic revisions..."
 echo "------------------------------------------------------------"
-python3 migrate_multiuser.py
+alembic upgrade head
 if [ $? -ne 0 ]; then
     echo ""
-    echo "❌ Multiuser migration failed!"
-    exit 1
-fi
-
-echo ""
-echo "Step 2: Adding created_by to deliveries and transactions..."
-echo "------------------------------------------------------------"
-python3 add_created_by_to_deliveries_transactions.py
-if [ $? -ne 0 ]; then
-    echo ""
-    echo "❌ Deliveries/Transactions migration failed!"
+    echo "❌ Alembic migration failed!"
     exit 1
 fi
 
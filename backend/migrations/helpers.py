@@ -0,0 +1,86 @@
+"""Helpers shared by revisions that change existing tables without long locks"""
+from alembic import context, op
+import sqlalchemy as sa
+
+# Rows updated per statement; override with ``alembic -x batch_size=N upgrade head``
+BATCH_SIZE = 1000
+
+
+def get_batch_size():
+    return int(context.get_x_argument(as_dictionary=True).get("batch_size", BATCH_SIZE))
+
+
+def has_column(table_name, column_name):
+    columns = sa.inspect(op.get_bind()).get_columns(table_name)
+    return any(column["name"] == column_name for column in columns)
+
+
+def has_index(table_name, index_name):
+    indexes = sa.inspect(op.get_bind()).get_indexes(table_name)
+    return any(index["name"] == index_name for index in indexes)
+
+
+def has_foreign_key(table_name, column_name):
+    foreign_keys = sa.inspect(op.get_bind()).get_foreign_keys(table_name)
+    return any(foreign_key["constrained_columns"] == [column_name] for foreign_key in foreign_keys)
+
+
+def is_nullable(table_name, column_name):
+    columns = sa.inspect(op.get_bind()).get_columns(table_name)
+    return next(column["nullable"] for column in columns if column["name"] == column_name)
+
+
+def create_index_online(index_name, table_name, columns, unique=False):
+    """Create an index unless it exists, without blocking writes on PostgreSQL
+
+    PostgreSQL builds the index with CREATE INDEX CONCURRENTLY, which cannot
+    run inside a transaction, so it is issued from an autocommit block.
+    """
+    if has_index(table_name, index_name):
+        return
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(index_name, table_name, columns, unique=unique, postgresql_concurrently=True)
+    else:
+        op.create_index(index_name, table_name, columns, unique=unique)
+
+
+def drop_index_if_exists(index_name, table_name):
+    if has_index(table_name, index_name):
+        op.drop_index(index_name, table_name=table_name)
+
+
+def get_admin_user_id():
+    """Id of the oldest admin user, or None when there is no admin yet"""
+    users = sa.table("users", sa.column("id"), sa.column("role"))
+    return op.get_bind().scalar(
+        sa.select(users.c.id).where(users.c.role == "ADMIN").order_by(users.c.id).limit(1)
+    )
+
+
+def backfill_in_batches(table, values, whereclause):
+    """Update the rows matching whereclause, one committed batch at a time
+
+    Each batch selects the next BATCH_SIZE matching primary keys after the
+    last one handled and updates only those rows. The loop runs inside an
+    autocommit block, so every batch commits on its own and its row locks are
+    released straight away instead of being held until the revision ends.
+    """
+    batch_size = get_batch_size()
+    updated = 0
+    last_id = None
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while True:
+            query = sa.select(table.c.id).where(whereclause).order_by(table.c.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(table.c.id > last_id)
+            ids = bind.scalars(query).all()
+            if not ids:
+                break
+            bind.execute(sa.update(table).where(table.c.id.in_(ids)).values(values))
+            updated += len(ids)
+            last_id = ids[-1]
+    return updated
+
+# Made with Bob
@@ -0,0 +1,180 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 02:18:05.002342
+
+Databases created by the old import-time ``create_all`` already have some or
+all of these tables, so each table is only created when it is missing. Running
+``alembic upgrade head`` on such a database adopts it into the migration chain.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('users'):
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('hashed_password', sa.String(), nullable=False),
+            sa.Column('role', sa.Enum('ADMIN', 'USER', name='userrole'), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_users_id', 'users', ['id'])
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if not _has_table('clients'):
+        op.create_table(
+            'clients',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('phone', sa.String(), nullable=False),
+            sa.Column('location', sa.String(), nullable=False),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('created_by', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_clients_id', 'clients', ['id'])
+        op.create_index('ix_clients_name', 'clients', ['name'])
+        op.create_index('ix_clients_email', 'clients', ['email'], unique=True)
+        op.create_index('ix_clients_created_by', 'clients', ['created_by'])
+
+    if not _has_table('orders'):
+        op.create_table(
+            'orders',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('client_id', sa.Integer(), nullable=False),
+            sa.Column('order_name', sa.String(), nullable=False),
+            sa.Column('order_link', sa.String(), nullable=True),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('cost', sa.Float(), nullable=False),
+            sa.Column('customer_price', sa.Float(), nullable=False),
+            sa.Column('taxes', sa.Float(), nullable=False),
+            sa.Column('profit', sa.Float(), nullable=True),
+            sa.Column('status', sa.Enum('PENDING', 'COMPLETED', name='orderstatus'), nullable=False),
+            sa.Column('created_by', sa.Integer(), nullable=False),
+            sa.Column('assigned_to', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['client_id'], ['clients.id']),
+            sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+            sa.ForeignKeyConstraint(['assigned_to'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_orders_id', 'orders', ['id'])
+        op.create_index('ix_orders_created_by', 'orders', ['created_by'])
+        op.create_index('ix_orders_assigned_to', 'orders', ['assigned_to'])
+
+    if not _has_table('deliveries'):
+        op.create_table(
+            'deliveries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=False),
+            sa.Column('tracking_number', sa.String(), nullable=True),
+            sa.Column('delivery_address', sa.String(), nullable=False),
+            sa.Column('driver_name', sa.String(), nullable=True),
+            sa.Column('driver_phone', sa.String(), nullable=True),
+            sa.Column('status', sa.Enum('PENDING', 'IN_TRANSIT', 'DELIVERED', 'FAILED', name='deliverystatus'), nullable=False),
+            sa.Column('notes', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('created_by', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+            sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('order_id')
+        )
+        op.create_index('ix_deliveries_id', 'deliveries', ['id'])
+
+    if not _has_table('transactions'):
+        op.create_table(
+            'transactions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('type', sa.Enum('INCOME', 'EXPENSE', name='transactiontype'), nullable=False),
+            sa.Column('category', sa.Enum('ORDER_PAYMENT', 'DELIVERY_COST', 'PRODUCT_COST', 'OPERATIONAL', 'OTHER', name='transactioncategory'), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('description', sa.String(), nullable=True),
+            sa.Column('reference_id', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('transaction_date', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('created_by', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_transactions_id', 'transactions', ['id'])
+
+    if not _has_table('monthly_financials'):
+        op.create_table(
+            'monthly_financials',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('year', sa.Integer(), nullable=False),
+            sa.Column('month', sa.Integer(), nullable=False),
+            sa.Column('monthly_profit', sa.Float(), nullable=False),
+            sa.Column('monthly_revenue', sa.Float(), nullable=False),
+            sa.Column('overall_capital', sa.Float(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('reset_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_monthly_financials_id', 'monthly_financials', ['id'])
+        op.create_index('ix_monthly_financials_year', 'monthly_financials', ['year'])
+        op.create_index('ix_monthly_financials_month', 'monthly_financials', ['month'])
+
+    if not _has_table('budget_transactions'):
+        op.create_table(
+            'budget_transactions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('type', sa.Enum('ADDITION', 'WITHDRAWAL', name='budgettransactiontype'), nullable=False),
+            sa.Column('account', sa.Enum('MONTHLY_PROFIT', 'OVERALL_CAPITAL', name='budgetaccount'), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('reference_id', sa.String(), nullable=True),
+            sa.Column('created_by', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('transaction_date', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_budget_transactions_id', 'budget_transactions', ['id'])
+
+
+def downgrade():
+    op.drop_table('budget_transactions')
+    op.drop_table('monthly_financials')
+    op.drop_table('transactions')
+    op.drop_table('deliveries')
+    op.drop_table('orders')
+    op.drop_table('clients')
+    op.drop_table('users')
+    sa.Enum(name='budgettransactiontype').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='budgetaccount').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='transactiontype').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='transactioncategory').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='deliverystatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='orderstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,105 @@
+"""multi-user ownership of clients and orders
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:12:41.518203
+
+Replaces ``migrate_multiuser.py``. Adds the user role and active flag, adds
+``created_by`` to clients and orders, makes the first user an admin when there
+is none, and assigns all unowned clients and orders to that admin in batches.
+Every step checks the current schema first, so databases already migrated by
+the old script are brought in line rather than altered twice.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import (
+    backfill_in_batches,
+    get_admin_user_id,
+    has_column,
+    has_foreign_key,
+    has_index,
+    is_nullable,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _add_user_columns():
+    bind = op.get_bind()
+    users = sa.table('users', sa.column('id'), sa.column('role'), sa.column('is_active'))
+
+    if not has_column('users', 'role'):
+        role_type = sa.Enum('ADMIN', 'USER', name='userrole')
+        role_type.create(bind, checkfirst=True)
+        op.add_column('users', sa.Column('role', role_type, server_default='USER', nullable=False))
+    else:
+        role_column = next(c for c in sa.inspect(bind).get_columns('users') if c['name'] == 'role')
+        if not isinstance(role_column['type'], sa.Enum):
+            # The old script stored lowercase enum values; the model stores member names
+            backfill_in_batches(users, {'role': 'USER'}, users.c.role == 'user')
+            backfill_in_batches(users, {'role': 'ADMIN'}, users.c.role == 'admin')
+
+    if not has_column('users', 'is_active'):
+        op.add_column('users', sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+    if get_admin_user_id() is None:
+        first_user_id = bind.scalar(sa.select(users.c.id).order_by(users.c.id).limit(1))
+        if first_user_id is not None:
+            bind.execute(
+                sa.update(users)
+                .where(users.c.id == first_user_id)
+                .values(role='ADMIN', is_active=True)
+            )
+
+
+def _add_owner_column(table_name):
+    if not has_column(table_name, 'created_by'):
+        op.add_column(table_name, sa.Column('created_by', sa.Integer(), nullable=True))
+
+    table = sa.table(table_name, sa.column('id'), sa.column('created_by'))
+    unowned = op.get_bind().scalar(
+        sa.select(table.c.id).where(table.c.created_by.is_(None)).limit(1)
+    )
+    if unowned is not None:
+        admin_id = get_admin_user_id()
+        if admin_id is None:
+            raise RuntimeError(
+                f"Cannot assign existing {table_name} to an owner: no users found. "
+                "Create an admin user first."
+            )
+        backfill_in_batches(table, {'created_by': admin_id}, table.c.created_by.is_(None))
+
+    needs_not_null = is_nullable(table_name, 'created_by')
+    needs_foreign_key = not has_foreign_key(table_name, 'created_by')
+    if needs_not_null or needs_foreign_key:
+        with op.batch_alter_table(table_name) as batch_op:
+            if needs_not_null:
+                batch_op.alter_column('created_by', existing_type=sa.Integer(), nullable=False)
+            if needs_foreign_key:
+                batch_op.create_foreign_key(f'fk_{table_name}_created_by_users', 'users', ['created_by'], ['id'])
+
+    if not has_index(table_name, f'ix_{table_name}_created_by'):
+        op.create_index(f'ix_{table_name}_created_by', table_name, ['created_by'])
+
+
+def upgrade():
+    _add_user_columns()
+    _add_owner_column('clients')
+    _add_owner_column('orders')
+
+
+def downgrade():
+    for table_name in ('orders', 'clients'):
+        op.drop_index(f'ix_{table_name}_created_by', table_name=table_name)
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column('created_by')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('is_active')
+        batch_op.drop_column('role')
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
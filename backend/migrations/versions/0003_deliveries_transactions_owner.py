@@ -0,0 +1,59 @@
+"""created_by on deliveries and transactions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:26:03.774915
+
+Replaces ``add_created_by_to_deliveries_transactions.py``. Instead of leaving
+existing rows unowned, deliveries are assigned to the creator of their order
+and transactions to the admin user, in batches.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import (
+    backfill_in_batches,
+    get_admin_user_id,
+    has_column,
+    has_foreign_key,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def _add_owner_column(table_name):
+    if not has_column(table_name, 'created_by'):
+        op.add_column(table_name, sa.Column('created_by', sa.Integer(), nullable=True))
+    if not has_foreign_key(table_name, 'created_by'):
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.create_foreign_key(f'fk_{table_name}_created_by_users', 'users', ['created_by'], ['id'])
+
+
+def upgrade():
+    _add_owner_column('deliveries')
+    _add_owner_column('transactions')
+
+    orders = sa.table('orders', sa.column('id'), sa.column('created_by'))
+    deliveries = sa.table('deliveries', sa.column('id'), sa.column('order_id'), sa.column('created_by'))
+    order_owner = (
+        sa.select(orders.c.created_by)
+        .where(orders.c.id == deliveries.c.order_id)
+        .scalar_subquery()
+    )
+    backfill_in_batches(deliveries, {'created_by': order_owner}, deliveries.c.created_by.is_(None))
+
+    admin_id = get_admin_user_id()
+    if admin_id is not None:
+        transactions = sa.table('transactions', sa.column('id'), sa.column('created_by'))
+        backfill_in_batches(transactions, {'created_by': admin_id}, transactions.c.created_by.is_(None))
+
+
+def downgrade():
+    for table_name in ('transactions', 'deliveries'):
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column('created_by')
@@ -0,0 +1,38 @@
+"""assigned_to on orders
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:31:57.062448
+
+Replaces ``add_assigned_to_orders.py``. The old script named its index
+``idx_orders_assigned_to``; it is renamed to match the model.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column, has_foreign_key, has_index
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_column('orders', 'assigned_to'):
+        op.add_column('orders', sa.Column('assigned_to', sa.Integer(), nullable=True))
+    if not has_foreign_key('orders', 'assigned_to'):
+        with op.batch_alter_table('orders') as batch_op:
+            batch_op.create_foreign_key('fk_orders_assigned_to_users', 'users', ['assigned_to'], ['id'])
+    if has_index('orders', 'idx_orders_assigned_to'):
+        op.drop_index('idx_orders_assigned_to', table_name='orders')
+    if not has_index('orders', 'ix_orders_assigned_to'):
+        op.create_index('ix_orders_assigned_to', 'orders', ['assigned_to'])
+
+
+def downgrade():
+    op.drop_index('ix_orders_assigned_to', table_name='orders')
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_column('assigned_to')
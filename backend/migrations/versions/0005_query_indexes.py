@@ -0,0 +1,79 @@
+"""composite indexes for the API query shapes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 10:04:18.330571
+
+Indexes lead with the equality predicates the routers filter on (owner,
+status, type, account) followed by the column they range over or sort by.
+Single-column indexes that became a prefix of a composite are dropped.
+``monthly_financials`` gains a unique ``(year, month)`` index; duplicated
+months must be merged by hand before this revision can run.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import create_index_online, drop_index_if_exists
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_orders_created_by_status_completed_at', 'orders', ['created_by', 'status', 'completed_at']),
+    ('ix_orders_assigned_to_status', 'orders', ['assigned_to', 'status']),
+    ('ix_orders_status_completed_at', 'orders', ['status', 'completed_at']),
+    ('ix_orders_created_at', 'orders', ['created_at']),
+    ('ix_clients_created_by_created_at', 'clients', ['created_by', 'created_at']),
+    ('ix_clients_created_at', 'clients', ['created_at']),
+    ('ix_deliveries_created_by_status', 'deliveries', ['created_by', 'status']),
+    ('ix_deliveries_status', 'deliveries', ['status']),
+    ('ix_transactions_type_transaction_date', 'transactions', ['type', 'transaction_date']),
+    ('ix_transactions_created_by_transaction_date', 'transactions', ['created_by', 'transaction_date']),
+    ('ix_budget_transactions_account_transaction_date', 'budget_transactions', ['account', 'transaction_date']),
+    ('ix_budget_transactions_transaction_date', 'budget_transactions', ['transaction_date']),
+]
+
+SUPERSEDED_INDEXES = [
+    ('ix_orders_created_by', 'orders', ['created_by']),
+    ('ix_orders_assigned_to', 'orders', ['assigned_to']),
+    ('ix_clients_created_by', 'clients', ['created_by']),
+    ('ix_monthly_financials_year', 'monthly_financials', ['year']),
+    ('ix_monthly_financials_month', 'monthly_financials', ['month']),
+]
+
+
+def _check_duplicate_months():
+    monthly_financials = sa.table('monthly_financials', sa.column('year'), sa.column('month'))
+    duplicates = op.get_bind().execute(
+        sa.select(monthly_financials.c.year, monthly_financials.c.month)
+        .group_by(monthly_financials.c.year, monthly_financials.c.month)
+        .having(sa.func.count() > 1)
+    ).all()
+    if duplicates:
+        months = ", ".join(f"{year}-{month:02d}" for year, month in duplicates)
+        raise RuntimeError(
+            f"monthly_financials has more than one row for {months}. "
+            "Merge them into a single row per month and rerun the migration."
+        )
+
+
+def upgrade():
+    _check_duplicate_months()
+    create_index_online('ix_monthly_financials_year_month', 'monthly_financials', ['year', 'month'], unique=True)
+    for index_name, table_name, columns in INDEXES:
+        create_index_online(index_name, table_name, columns)
+    for index_name, table_name, _ in SUPERSEDED_INDEXES:
+        drop_index_if_exists(index_name, table_name)
+
+
+def downgrade():
+    for index_name, table_name, columns in SUPERSEDED_INDEXES:
+        create_index_online(index_name, table_name, columns)
+    for index_name, table_name, _ in INDEXES:
+        drop_index_if_exists(index_name, table_name)
+    drop_index_if_exists('ix_monthly_financials_year_month', 'monthly_financials')
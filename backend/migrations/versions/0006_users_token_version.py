@@ -0,0 +1,30 @@
+"""token_version on users
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 11:02:47.190358
+
+The constant server default fills existing rows without a table rewrite on
+PostgreSQL, so no backfill is needed.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_column('users', 'token_version'):
+        op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,36 @@
+"""keyset pagination indexes on orders
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 13:40:52.774016
+
+Order lists are sorted newest first by ``(created_at, id)`` and paged with a
+cursor on that pair. ``ix_orders_created_at`` is a prefix of the new
+``(created_at, id)`` index and is dropped.
+"""
+from migrations.helpers import create_index_online, drop_index_if_exists
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_orders_created_at_id', 'orders', ['created_at', 'id']),
+    ('ix_orders_status_created_at_id', 'orders', ['status', 'created_at', 'id']),
+]
+
+
+def upgrade():
+    for index_name, table_name, columns in INDEXES:
+        create_index_online(index_name, table_name, columns)
+    drop_index_if_exists('ix_orders_created_at', 'orders')
+
+
+def downgrade():
+    create_index_online('ix_orders_created_at', 'orders', ['created_at'])
+    for index_name, table_name, _ in INDEXES:
+        drop_index_if_exists(index_name, table_name)
@@ -0,0 +1,40 @@
+"""shard rows for monthly financials
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 16:02:37.418265
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'monthly_financials_shards',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('financials_id', sa.Integer(), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('monthly_profit', sa.Float(), nullable=False),
+        sa.Column('monthly_revenue', sa.Float(), nullable=False),
+        sa.Column('overall_capital', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['financials_id'], ['monthly_financials.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_monthly_financials_shards_month_shard',
+        'monthly_financials_shards',
+        ['financials_id', 'shard'],
+        unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('ix_monthly_financials_shards_month_shard', table_name='monthly_financials_shards')
+    op.drop_table('monthly_financials_shards')
@@ -0,0 +1,25 @@
+"""index revoked tokens by revocation time
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 09:12:41.338190
+
+Workers reload revocations made within a window behind the newest one they
+have seen, filtering on ``revoked_at`` instead of ``id``.
+"""
+from migrations.helpers import create_index_online, drop_index_if_exists
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_index_online('ix_revoked_tokens_revoked_at', 'revoked_tokens', ['revoked_at'])
+
+
+def downgrade():
+    drop_index_if_exists('ix_revoked_tokens_revoked_at', 'revoked_tokens')
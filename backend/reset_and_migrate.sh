@@ -12,6 +12,10 @@ else
     echo "ℹ️  No existing database found"
 fi
 
+echo ""
+echo "🗄️  Creating schema..."
+alembic upgrade head
+
 echo ""
 echo "🌱 Running seed script to create fresh database..."
 python3 seed_data.py
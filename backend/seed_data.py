@@ -1,21 +1,19 @@
 """
 Database Seed Script for Fast-Dropship
 Run this script to populate the database with sample data for testing
+Create the schema first with: alembic upgrade head
 """
 
-from app.core.database import SessionLocal, engine
+from app.core.database import SessionLocal
 from app.core.security import get_password_hash
 from app.models import (
-    Base, User, Client, Order, OrderStatus, Transaction, TransactionType,
+    User, Client, Order, OrderStatus, Transaction, TransactionType,
     TransactionCategory, Delivery, DeliveryStatus, MonthlyFinancials,
     BudgetTransaction, BudgetTransactionType, BudgetAccount, UserRole
 )
 from datetime import datetime, timedelta
 import random
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
 def seed_database():
     db = SessionLocal()
     
@@ -12,6 +12,8 @@ export default function AddOrderPage() {
   const [users, setUsers] = useState<User[]>([]);
   const [userIsAdmin, setUserIsAdmin] = useState(false);
   const [loading, setLoading] = useState(false);
+  // One key per form, so a resubmit after a lost response can't create the order twice
+  const [idempotencyKey] = useState(() => crypto.randomUUID());
   const [formData, setFormData] = useState<OrderCreate>({
     client_id: 0,
     order_name: '',
@@ -60,7 +62,7 @@ export default function AddOrderPage() {
     setLoading(true);
 
     try {
-      await api.post('/orders', formData);
+      await api.post('/orders', formData, { headers: { 'Idempotency-Key': idempotencyKey } });
       router.push('/order-pending');
     } catch (err: any) {
       alert(err.response?.data?.detail || 'Failed to create order');
@@ -32,11 +32,17 @@ export default function ChangePasswordPage() {
     setLoading(true);
 
     try {
-      await api.post('/auth/change-password', {
+      const response = await api.post('/auth/change-password', {
         old_password: formData.old_password,
         new_password: formData.new_password,
       });
       
+      // Changing the password revokes existing tokens; keep the session with the new one
+      if (response.data.access_token) {
+        localStorage.setItem('token', response.data.access_token);
+        localStorage.setItem('refresh_token', response.data.refresh_token);
+      }
+      
       setSuccess(true);
       setFormData({
         old_password: '',
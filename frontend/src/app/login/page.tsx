@@ -37,6 +37,7 @@ export default function LoginPage() {
         });
 
         localStorage.setItem('token', response.data.access_token);
+        localStorage.setItem('refresh_token', response.data.refresh_token);
         // Fetch and cache user info
         await getCurrentUser();
         router.push('/dashboard');
@@ -66,6 +67,7 @@ export default function LoginPage() {
         });
 
         localStorage.setItem('token', response.data.access_token);
+        localStorage.setItem('refresh_token', response.data.refresh_token);
         // Fetch and cache user info
         await getCurrentUser();
         router.push('/dashboard');
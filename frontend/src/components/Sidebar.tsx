@@ -20,6 +20,7 @@ import {
 } from 'lucide-react';
 import { useState } from 'react';
 import { useAuth } from '@/contexts/AuthContext';
+import api from '@/lib/api';
 
 const menuItems = [
   { icon: Home, label: 'Home', path: '/dashboard' },
@@ -47,8 +48,14 @@ export default function Sidebar() {
   const [isOpen, setIsOpen] = useState(false);
   const { isAdmin } = useAuth();
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      // Revoke the refresh token; leaving still works if the request fails
+      await api.post('/auth/logout', { refresh_token: refreshToken }).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     router.push('/login');
   };
 
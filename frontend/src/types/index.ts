@@ -36,6 +36,7 @@ export interface LoginRequest {
 export interface AuthResponse {
   access_token: string;
   token_type: string;
+  refresh_token?: string;
 }
 
 export interface ChangePasswordRequest {
@@ -75,6 +75,7 @@ echo ""
 echo "1. Start Backend (in one terminal):"
 echo "   cd backend"
 echo "   source venv/bin/activate"
+echo "   alembic upgrade head"
 echo "   uvicorn app.main:app --reload"
 echo ""
 echo "2. Start Frontend (in another terminal):"